@@ -1,19 +1,47 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+import io
+import itertools
+import sqlite3
+import logging
+import threading
+import time
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, Response, \
+    stream_with_context
 import psycopg2  # PostgreSQL
-import qrcode
 from urllib.parse import urlparse
 from flask_wtf.csrf import CSRFProtect
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired
-import io
-import base64
+from werkzeug.middleware.proxy_fix import ProxyFix
+from db_pool import ConnectionPool, PoolTimeout
+import sqlite_compat
+from qr_cache import QRCache, contact_text, ERROR_CORRECTION, MIMETYPES
+from qr_links import sign_contact_id, verify_token, contact_url
+from contact_rows import iter_rows
+from qr_batch import shared_executor, stream_zip
+from read_cache import ReadThroughCache
+from user_repository import PostgresContactRepository, normalise_vehicle
+from password_hashing import PasswordHasher, HashingBusy
+from attempt_limiter import AttemptLimiter
+import instrumentation
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "your_secret_key")
+# Larger request bodies are answered with 413 before they are read; only /batch_qr uploads files
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("MAX_UPLOAD_BYTES", str(2 * 1024 * 1024)))
+instrumentation.init_app(app)
 csrf = CSRFProtect(app)
+logger = logging.getLogger("quickcare")
+
+# Reverse proxies in front of the app that append to X-Forwarded-For/-Proto. Without this,
+# request.remote_addr is the proxy's address and every client shares one per-IP limit.
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT, x_proto=TRUSTED_PROXY_COUNT)
+# Per-IP limits are only on once the client address can be trusted: behind a proxy via
+# TRUSTED_PROXY_COUNT, or IP_RATE_LIMITS=1 when clients connect to the app directly
+IP_RATE_LIMITS = os.getenv("IP_RATE_LIMITS", "1" if TRUSTED_PROXY_COUNT else "0") == "1"
 
 # Get the database URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -24,20 +52,59 @@ if not DATABASE_URL:
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Unique-constraint violations from either backend
+IntegrityError = (psycopg2.IntegrityError, sqlite3.IntegrityError)
+
 def get_db_connection():
+    # sqlite:///path is a local stand-in for benchmarks and development
+    if DATABASE_URL.startswith("sqlite:///"):
+        return sqlite_compat.connect(DATABASE_URL[len("sqlite:///"):], on_statement=instrumentation.observe_sql)
     result = urlparse(DATABASE_URL)
     return psycopg2.connect(
         dbname=result.path[1:],  
         user=result.username,
         password=result.password,
         host=result.hostname,
-        port=result.port
+        port=result.port,
+        cursor_factory=instrumentation.TimedCursor
     )
 
+# Connection pool shared by all requests in this worker process
+db_pool = ConnectionPool(
+    get_db_connection,
+    min_size=int(os.getenv("DB_POOL_MIN", "1")),
+    max_size=int(os.getenv("DB_POOL_MAX", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    health_check_after=int(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30")),
+    on_checkout=instrumentation.observe_checkout,
+)
+
+def get_db():
+    # One pooled connection per request, returned in teardown
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.getconn()
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.putconn(conn, discard=bool(conn.closed))
+
+@app.errorhandler(PoolTimeout)
+def pool_exhausted(e):
+    instrumentation.ERRORS.labels("db_pool").inc()
+    logger.warning("Database pool exhausted: %s", e)
+    return "Service Unavailable", 503
+
+# Vehicle lookups over emergency_contacts, same interface as the SQLite users repository
+contact_repository = PostgresContactRepository(db_pool)
+
 # Initialize database tables
 def init_db():
     try:
-        with get_db_connection() as conn:
+        with db_pool.connection() as conn, conn:
             with conn.cursor() as cur:
                 cur.execute('''
                     CREATE TABLE IF NOT EXISTS users (
@@ -51,19 +118,164 @@ def init_db():
                         id SERIAL PRIMARY KEY,
                         name TEXT NOT NULL,
                         mobile TEXT NOT NULL UNIQUE,
-                        vehicle TEXT NOT NULL UNIQUE
+                        vehicle TEXT NOT NULL UNIQUE,
+                        owner TEXT
                     )
                 ''')
+                # Username that created the contact; rows from before this column have no owner
+                # and can't be viewed or changed from the web until `bulk_import.py --owner` claims them
+                cur.execute('ALTER TABLE emergency_contacts ADD COLUMN IF NOT EXISTS owner TEXT')
                 conn.commit()
-    except Exception as e:
-        print("Database initialization failed:", e)
+        db_pool.fill()
+    except Exception:
+        instrumentation.ERRORS.labels("init_db").inc()
+        logger.exception("Database initialization failed")
+    ensure_contact_index()
+
+# Link-mode upserts need the unique plate index. ensure_schema() refuses to build it while
+# duplicate plates exist (or fails while the DB is down), so link mode answers 503 and the
+# check is retried at most once a minute until it succeeds.
+contact_index_ready = False
+contact_index_checked = None
+contact_index_lock = threading.Lock()
+
+def ensure_contact_index():
+    global contact_index_ready, contact_index_checked
+    if contact_index_ready:
+        return True
+    with contact_index_lock:
+        if contact_index_ready or (contact_index_checked is not None
+                                   and time.monotonic() - contact_index_checked < 60):
+            return contact_index_ready
+        contact_index_checked = time.monotonic()
+        try:
+            contact_repository.ensure_schema()
+            contact_index_ready = True
+        except Exception:
+            instrumentation.ERRORS.labels("contact_index").inc()
+            logger.exception("Unique vehicle index unavailable; link-mode QR codes are disabled")
+    return contact_index_ready
 
 init_db()
 
-# Ensure QR code folder exists
-QR_FOLDER = "static/qr_codes"
+# Text-mode images carry contact details, so keep them out of static/ and only serve them via /qr/<name>
+QR_FOLDER = os.getenv("QR_FOLDER", os.path.join(app.instance_path, "qr_codes"))
 os.makedirs(QR_FOLDER, exist_ok=True)
 
+# Rendered QR images keyed by a hash of their content
+qr_cache = QRCache(
+    QR_FOLDER,
+    max_bytes=int(os.getenv("QR_CACHE_BYTES", str(16 * 1024 * 1024))),
+    max_disk_bytes=int(os.getenv("QR_DISK_BYTES", str(256 * 1024 * 1024))),
+    max_age=float(os.getenv("QR_DISK_MAX_AGE", str(7 * 24 * 3600))),
+    on_render=instrumentation.observe_qr_render,
+)
+
+# "text" embeds the contact details; "url" encodes a short signed link to the emergency page
+QR_DEFAULT_MODE = os.getenv("QR_DEFAULT_MODE", "text")
+# Printed stickers carry these links, so keep this key stable once set
+QR_LINK_SECRET = os.getenv("QR_LINK_SECRET", app.config['SECRET_KEY'])
+QR_BASE_URL = os.getenv("QR_BASE_URL")
+# Render processes per web worker for /batch_qr (default: CPU count, at most 4)
+QR_BATCH_WORKERS = int(os.getenv("QR_BATCH_WORKERS", "0")) or None
+# Rows accepted per /batch_qr upload; larger files get 413
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "5000"))
+
+# Emergency contact rows by id, and rendered emergency pages by row content
+contact_cache = ReadThroughCache(
+    ttl=float(os.getenv("EMERGENCY_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("EMERGENCY_CACHE_SIZE", "10000")),
+    negative_ttl=float(os.getenv("EMERGENCY_CACHE_NEGATIVE_TTL", "5")),
+    stale_ttl=float(os.getenv("EMERGENCY_CACHE_STALE_TTL", "300")),
+)
+emergency_page_cache = ReadThroughCache(
+    ttl=float(os.getenv("EMERGENCY_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("EMERGENCY_CACHE_SIZE", "10000")),
+)
+
+def load_emergency_contact(contact_id):
+    # Uses the pool directly so background refreshes work outside a request
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute('SELECT name, mobile, vehicle, owner FROM emergency_contacts WHERE id = %s', (contact_id,))
+            return cur.fetchone()
+
+class VehicleTaken(Exception):
+    pass
+
+def save_emergency_contact(full_name, mobile, vehicle, owner):
+    # Creates the contact, or updates it if `owner` already registered this plate.
+    # Uses its own short checkout so a streaming batch doesn't hold a connection throughout.
+    with db_pool.connection() as conn, conn:
+        with conn.cursor() as cur:
+            cur.execute('''
+                INSERT INTO emergency_contacts (name, mobile, vehicle, owner) VALUES (%%s, %%s, %%s, %%s)
+                %s DO UPDATE SET name = EXCLUDED.name, mobile = EXCLUDED.mobile, vehicle = EXCLUDED.vehicle
+                WHERE emergency_contacts.owner = EXCLUDED.owner
+                RETURNING id
+            ''' % contact_repository.ON_CONFLICT, (full_name, mobile, vehicle, owner))
+            row = cur.fetchone()
+    if row is None:
+        # The plate belongs to someone else; the WHERE above left their row alone
+        raise VehicleTaken(vehicle)
+    contact_cache.invalidate(row[0])
+    return row[0]
+
+def contact_link(full_name, mobile, vehicle, owner):
+    contact_id = save_emergency_contact(full_name, mobile, vehicle, owner)
+    return contact_url(QR_BASE_URL or request.host_url, sign_contact_id(contact_id, QR_LINK_SECRET))
+
+# Password hashing runs on a small bounded executor so a login burst
+# can't occupy every worker thread. This needs threaded workers (see gunicorn.conf.py):
+# a sync worker serves one request at a time, so the queue would never fill.
+password_hasher = PasswordHasher(
+    method=os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    queue_limit=int(os.getenv("PASSWORD_HASH_QUEUE", "8")),
+    on_complete=instrumentation.observe_password_hash,
+)
+
+# Checked before any hashing, so rejected attempts cost nothing
+login_user_limiter = AttemptLimiter(
+    max_attempts=int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_USER", "5")),
+    window=int(os.getenv("LOGIN_ATTEMPT_WINDOW", "300")),
+)
+login_ip_limiter = AttemptLimiter(
+    max_attempts=int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "20")),
+    window=int(os.getenv("LOGIN_ATTEMPT_WINDOW", "300")),
+)
+register_ip_limiter = AttemptLimiter(
+    max_attempts=int(os.getenv("REGISTER_MAX_ATTEMPTS_PER_IP", "10")),
+    window=int(os.getenv("REGISTER_ATTEMPT_WINDOW", "3600")),
+)
+
+def client_ip():
+    # None when per-IP limits are off
+    if not IP_RATE_LIMITS:
+        return None
+    return request.remote_addr or "unknown"
+
+@app.errorhandler(HashingBusy)
+def hashing_busy(e):
+    instrumentation.ERRORS.labels("password_hash").inc()
+    return "Service Unavailable", 503, {"Retry-After": "1"}
+
+# Pool, cache and hashing figures for /metrics
+CACHE_COUNTERS = ("hits", "stale_hits", "misses", "load_errors", "skipped_refreshes")
+instrumentation.export_stats("quickcare_db_pool", "Connection pool statistics", db_pool.stats,
+                             gauges=("size", "idle", "in_use", "waiting", "max_size"),
+                             counters=("checkouts", "timeouts", "discarded", "refill_errors"))
+instrumentation.export_stats("quickcare_qr_cache", "QR image cache statistics", qr_cache.stats,
+                             gauges=("entries", "bytes"), shared_gauges=("disk_entries", "disk_bytes"),
+                             counters=("hits", "disk_hits", "misses", "disk_evictions"))
+instrumentation.export_stats("quickcare_contact_cache", "Emergency contact cache statistics", contact_cache.stats,
+                             gauges=("entries", "refreshing"), counters=CACHE_COUNTERS)
+instrumentation.export_stats("quickcare_page_cache", "Emergency page cache statistics", emergency_page_cache.stats,
+                             gauges=("entries", "refreshing"), counters=CACHE_COUNTERS)
+instrumentation.export_stats("quickcare_password_hash", "Password hashing statistics",
+                             lambda: {"rejected": password_hasher.rejected, "timeouts": password_hasher.timeouts},
+                             counters=("rejected", "timeouts"))
+
 class RegistrationForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
     password = PasswordField('Password', validators=[DataRequired()])
@@ -79,19 +291,120 @@ def generate_qr():
     mobile = request.form.get("mobile")
     vehicle = request.form.get("vehicle")
 
+    mode = request.form.get("mode", QR_DEFAULT_MODE)
+    ec = request.form.get("ec", "M").upper()
+    fmt = request.form.get("format", "png").lower()
+
     if not full_name or not mobile or not vehicle:
         return "Missing data", 400
+    if mode not in ("text", "url") or ec not in ERROR_CORRECTION or fmt not in MIMETYPES:
+        return "Invalid QR options", 400
 
     # Create QR data
-    qr_data = f"Name: {full_name}\nMobile: {mobile}\nVehicle: {vehicle}"
+    if mode == "url":
+        # Link mode stores the contact, so only its owner may create or change it
+        if 'username' not in session:
+            return "Log in to create link QR codes", 401
+        if not ensure_contact_index():
+            return "Link QR codes are temporarily unavailable", 503
+        try:
+            qr_data = contact_link(full_name, mobile, vehicle, session['username'])
+        except VehicleTaken:
+            return "Vehicle is already registered to another account", 409
+        except IntegrityError:
+            return "Mobile number is already registered to another vehicle", 409
+    else:
+        qr_data = contact_text(full_name, mobile, vehicle)
+
+    # Generate QR code, or reuse the cached image for identical data
+    name, _ = qr_cache.get_or_render(qr_data, ec, fmt)
+    qr_url = url_for("qr_image", name=name)
+
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return jsonify(qr_image=qr_url)
+    return render_template("qr_display.html", qr_url=qr_url)
+
+@app.route("/qr/<name>")
+def qr_image(name):
+    image = qr_cache.get(name)
+    if image is None:
+        return "Not Found", 404
 
-    # Generate QR code
-    qr = qrcode.make(qr_data)
-    buffer = io.BytesIO()
-    qr.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    # The URL is derived from the content, so the image never changes
+    digest, ext = name.split(".")
+    response = app.response_class(image, mimetype=MIMETYPES[ext])
+    response.set_etag(digest)
+    # Private: text-mode images contain personal details, so keep them out of shared caches
+    response.cache_control.private = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+def reject_repeated_plates(rows):
+    # Link mode upserts by normalised plate, so a later row with the same plate would
+    # silently overwrite an earlier one; keep the first and report the rest
+    seen = {}
+    for line_no, row, error in rows:
+        if not error:
+            key = normalise_vehicle(row["vehicle"])
+            if key in seen:
+                error = "Vehicle duplicates line %s" % seen[key]
+            else:
+                seen[key] = line_no
+        yield line_no, row, error
+
+@app.route("/batch_qr", methods=["GET", "POST"])
+def batch_qr():
+    if 'username' not in session:
+        flash("Please log in to generate QR codes in bulk.", "danger")
+        return redirect(url_for('login'))
 
-    return render_template("qr_display.html", qr_code=qr_base64)
+    if request.method == "GET":
+        return render_template("batch_qr.html")
+
+    upload = request.files.get("contacts")
+    if not upload or not upload.filename:
+        flash("Choose a CSV or JSONL file to upload.", "danger")
+        return redirect(url_for('batch_qr'))
+
+    mode = request.form.get("mode", QR_DEFAULT_MODE)
+    ec = request.form.get("ec", "M").upper()
+    fmt = request.form.get("format", "png").lower()
+    if mode not in ("text", "url") or ec not in ERROR_CORRECTION or fmt not in MIMETYPES:
+        flash("Invalid QR options.", "danger")
+        return redirect(url_for('batch_qr'))
+
+    payload = None
+    if mode == "url":
+        if not ensure_contact_index():
+            flash("Link QR codes are temporarily unavailable.", "danger")
+            return render_template("batch_qr.html"), 503
+        owner = session['username']
+
+        def payload(row):
+            # Runs while the ZIP streams; a failure only skips this row
+            try:
+                return contact_link(row["full_name"], row["mobile"], row["vehicle"], owner)
+            except VehicleTaken:
+                raise ValueError("Vehicle is already registered to another account")
+            except IntegrityError:
+                raise ValueError("Mobile number is already registered to another vehicle")
+
+    # Rows are small; read them now because the upload is gone once streaming starts
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    rows = list(itertools.islice(iter_rows(stream, upload.filename), BATCH_MAX_ROWS + 1))
+    if len(rows) > BATCH_MAX_ROWS:
+        flash("Upload at most %d rows at a time." % BATCH_MAX_ROWS, "danger")
+        return render_template("batch_qr.html"), 413
+    if mode == "url":
+        rows = list(reject_repeated_plates(rows))
+
+    # Link mode builds links from this request's host, so keep its context while streaming
+    return Response(
+        stream_with_context(stream_zip(rows, shared_executor(QR_BATCH_WORKERS), ec=ec, fmt=fmt, payload=payload)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": "attachment; filename=qr_codes.zip"},
+    )
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -104,16 +417,23 @@ def register():
             flash("Username and password are required!", "danger")
             return redirect(url_for('register'))
 
-        hashed_password = generate_password_hash(password)
+        ip = client_ip()
+        if ip and register_ip_limiter.blocked(ip):
+            flash("Too many registration attempts. Please try again later.", "danger")
+            return render_template('register.html', form=form), 429
+        if ip:
+            register_ip_limiter.record(ip)
+
+        hashed_password = password_hasher.hash(password)
 
         try:
-            with get_db_connection() as conn:
+            with get_db() as conn:
                 with conn.cursor() as cur:
                     cur.execute('INSERT INTO users (username, password) VALUES (%s, %s)', (username, hashed_password))
                     conn.commit()
             flash("Registration successful! Please log in.", "success")
             return redirect(url_for('login'))
-        except psycopg2.IntegrityError:
+        except IntegrityError:
             flash("Username already exists!", "danger")
             return redirect(url_for('register'))
 
@@ -130,16 +450,37 @@ def login():
             flash("Username and password are required!", "danger")
             return redirect(url_for('login'))
 
-        with get_db_connection() as conn:
+        ip = client_ip()
+        user_key = username.lower()
+        if (ip and login_ip_limiter.blocked(ip)) or login_user_limiter.blocked(user_key):
+            flash("Too many login attempts. Please try again later.", "danger")
+            return render_template('login.html', form=form), 429
+
+        # Short checkouts of their own: a login can wait seconds for a hashing slot and must
+        # not hold a pooled connection the emergency pages need meanwhile
+        with db_pool.connection() as conn, conn:
             with conn.cursor() as cur:
                 cur.execute('SELECT id, username, password FROM users WHERE username = %s', (username,))
                 user = cur.fetchone()
 
-        if user and check_password_hash(user[2], password):
+        if user and password_hasher.verify(user[2], password):
+            login_user_limiter.reset(user_key)
+            if password_hasher.needs_rehash(user[2]):
+                # Upgrade hashes made with older parameters while we have the password
+                try:
+                    new_hash = password_hasher.hash(password)
+                    with db_pool.connection() as conn, conn:
+                        with conn.cursor() as cur:
+                            cur.execute('UPDATE users SET password = %s WHERE id = %s', (new_hash, user[0]))
+                except HashingBusy:
+                    pass
             session['username'] = username
             flash("Login successful!", "success")
             return redirect(url_for('home'))
 
+        login_user_limiter.record(user_key)
+        if ip:
+            login_ip_limiter.record(ip)
         flash("Invalid username or password!", "danger")
         return redirect(url_for('login'))
 
@@ -151,22 +492,60 @@ def logout():
     flash("You have been logged out.", "info")
     return redirect(url_for('login'))
 
+def render_emergency_contact(contact):
+    contact = tuple(contact)
+    return emergency_page_cache.get(contact, lambda: render_template(
+        'emergency_info.html', name=contact[0], mobile=contact[1], vehicle=contact[2]))
+
+def find_emergency_contact(contact_id):
+    try:
+        return contact_cache.get(contact_id, lambda: load_emergency_contact(contact_id))
+    except PoolTimeout:
+        raise
+    except Exception:
+        instrumentation.ERRORS.labels("emergency_info").inc()
+        logger.exception("Error fetching emergency contact %s", contact_id)
+        raise
+
 @app.route('/emergency-info/<int:contact_id>')
 def emergency_info(contact_id):
-    try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute('SELECT name, mobile, vehicle FROM emergency_contacts WHERE id = %s', (contact_id,))
-                contact = cur.fetchone()
+    # Ids are sequential and guessable, so this page is only for the contact's owner;
+    # everyone else reaches it through the signed /E/<token> link on the QR code
+    if 'username' not in session:
+        flash("Please log in to view your emergency contacts.", "danger")
+        return redirect(url_for('login'))
+    contact = find_emergency_contact(contact_id)
+    if not contact or contact[3] != session['username']:
+        flash("Emergency contact not found!", "danger")
+        return redirect(url_for('home'))
+    return render_emergency_contact(contact)
 
-        if not contact:
-            flash("Emergency contact not found!", "danger")
-            return redirect(url_for('home'))
+@app.route('/E/<token>')
+def emergency_link(token):
+    # Target of URL-mode QR codes
+    contact_id = verify_token(token, QR_LINK_SECRET)
+    if contact_id is None:
+        return "Not Found", 404
+    contact = find_emergency_contact(contact_id)
+    if not contact:
+        return "Not Found", 404
+    return render_emergency_contact(contact)
+
+@app.route('/pool-stats')
+def pool_stats():
+    if not instrumentation.authorized():
+        return "Not Found", 404
+    return jsonify(db_pool.stats())
 
-        return render_template('emergency_info.html', name=contact[0], mobile=contact[1], vehicle=contact[2])
-    except Exception as e:
-        print("Error fetching emergency contact:", e)
-        return "Internal Server Error", 500
+@app.route('/cache-stats')
+def cache_stats():
+    if not instrumentation.authorized():
+        return "Not Found", 404
+    return jsonify(
+        qr=qr_cache.stats(),
+        emergency_contacts=contact_cache.stats(),
+        emergency_pages=emergency_page_cache.stats(),
+    )
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
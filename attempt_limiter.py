@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class AttemptLimiter:
+    def __init__(self, max_attempts=5, window=300, max_keys=100000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._attempts = OrderedDict()  # key -> deque of attempt times, least recent first
+        self.blocked_count = 0
+
+    def _recent(self, key, now):
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return None
+        while attempts and now - attempts[0] >= self.window:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+            return None
+        return attempts
+
+    def blocked(self, key):
+        with self._lock:
+            attempts = self._recent(key, time.monotonic())
+            if attempts is not None and len(attempts) >= self.max_attempts:
+                self.blocked_count += 1
+                return True
+            return False
+
+    def record(self, key):
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._recent(key, now)
+            if attempts is None:
+                attempts = self._attempts[key] = deque(maxlen=self.max_attempts)
+            attempts.append(now)
+            self._attempts.move_to_end(key)
+            while len(self._attempts) > self.max_keys:
+                self._attempts.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
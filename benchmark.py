@@ -0,0 +1,332 @@
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+# Runs the app against a throwaway SQLite database, so no Postgres is needed:
+#   python benchmark.py --requests 500 --concurrency 8 --output run.json
+#   python benchmark.py --baseline run.json
+
+ROUTES = ("home", "generate_qr", "login", "register", "emergency_info")
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+# These routes redirect on failure too, so success is judged by where they send the client
+SUCCESS_REDIRECTS = {"login": "/", "register": "/login"}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarise(latencies, errors, elapsed):
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def _quiet_handler():
+    from werkzeug.serving import WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        # HTTP/1.1 so each client keeps its connection open between requests
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    return QuietHandler
+
+
+def setup_app(workdir, args):
+    # Configure before importing: app.py reads its settings at import time
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+    os.environ["QR_FOLDER"] = os.path.join(workdir, "qr_codes")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("DB_POOL_MAX", str(max(args.concurrency, 1)))
+    # Keep the limiters out of the way; they would turn most of the run into 429s
+    os.environ.setdefault("LOGIN_MAX_ATTEMPTS_PER_IP", "1000000000")
+    os.environ.setdefault("REGISTER_MAX_ATTEMPTS_PER_IP", "1000000000")
+    os.environ.setdefault("PASSWORD_HASH_QUEUE", str(args.concurrency * 2))
+    # Every login is "slow" by design; don't let the slow-request log flood the run
+    os.environ.setdefault("SLOW_REQUEST_MS", "60000")
+    if args.multiprocess_metrics:
+        # What gunicorn.conf.py sets up: metrics go through files shared by the workers
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(workdir, "metrics")
+        os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+    import app as app_module
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    return app_module
+
+
+def seed(app_module, contacts, users):
+    # Returns the signed /E/<token> link of each seeded contact
+    password_hash = app_module.password_hasher.hash("benchmark")
+    with app_module.db_pool.connection() as conn, conn:
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO emergency_contacts (name, mobile, vehicle) VALUES (%s, %s, %s)",
+                [("Contact %d" % i, "9%09d" % i, "KA01AB%06d" % i) for i in range(contacts)],
+            )
+            cur.executemany(
+                "INSERT INTO users (username, password) VALUES (%s, %s)",
+                [("user%d" % i, password_hash) for i in range(users)],
+            )
+            cur.execute("SELECT id FROM emergency_contacts ORDER BY id")
+            ids = [row[0] for row in cur.fetchall()]
+    from qr_links import sign_contact_id
+    return [sign_contact_id(contact_id, app_module.QR_LINK_SECRET) for contact_id in ids]
+
+
+def make_request(route, i, args, tokens):
+    if route == "home":
+        return "GET", "/", None
+    if route == "generate_qr":
+        n = i % args.contacts
+        body = {"full_name": "Contact %d" % n, "mobile": "9%09d" % n, "vehicle": "KA01AB%06d" % n}
+        return "POST", "/generate_qr", urlencode(body)
+    if route == "login":
+        return "POST", "/login", urlencode({"username": "user%d" % (i % args.users), "password": "benchmark"})
+    if route == "register":
+        return "POST", "/register", urlencode({"username": "new%d_%d" % (os.getpid(), i), "password": "benchmark"})
+    if route == "emergency_info":
+        # The public emergency page, as reached by scanning a link-mode QR code
+        return "GET", "/E/%s" % tokens[i % len(tokens)], None
+    raise ValueError(route)
+
+
+def succeeded(route, response):
+    expected = SUCCESS_REDIRECTS.get(route)
+    if expected is None:
+        return response.status == 200
+    return response.status == 302 and urlsplit(response.getheader("Location", "")).path == expected
+
+
+def drive(port, route, args, tokens):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def worker():
+        nonlocal errors
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine = []
+        failed = 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            method, path, body = make_request(route, i, args, tokens)
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=FORM_HEADERS if body else {})
+                response = conn.getresponse()
+                response.read()
+                ok = succeeded(route, response)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                ok = False
+            mine.append(time.perf_counter() - started)
+            if not ok:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarise(latencies, errors, time.perf_counter() - started)
+
+
+def micro(fn, iterations):
+    fn()  # warm up
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return summarise(timings, 0, sum(timings))
+
+
+def micro_benchmarks(app_module, args):
+    from qr_cache import contact_text, render_png, render_svg
+    from qr_links import contact_url, sign_contact_id
+
+    text = contact_text("Contact 12345", "9000012345", "KA01AB012345")
+    plates = ["ka 01 ab %06d" % n for n in range(0, args.contacts * 2, 2)][:100]
+    url = contact_url("https://quickcare.example.com", sign_contact_id(12345, "benchmark"))
+    hasher = app_module.password_hasher
+    stored = hasher.hash("benchmark")
+
+    results = {
+        "qr_png_text": micro(lambda: render_png(text), args.micro_iterations),
+        "qr_svg_text": micro(lambda: render_svg(text), args.micro_iterations),
+        "qr_png_url": micro(lambda: render_png(url), args.micro_iterations),
+        "qr_svg_url": micro(lambda: render_svg(url), args.micro_iterations),
+        "password_hash": micro(lambda: hasher.hash("benchmark"), args.hash_iterations),
+        "password_verify": micro(lambda: hasher.verify(stored, "benchmark"), args.hash_iterations),
+        # Half of the plates exist; normalised, so they only match through the key index
+        "vehicle_lookup_batch": micro(lambda: app_module.contact_repository.get_users_by_vehicles(plates),
+                                      args.micro_iterations),
+    }
+    results["qr_bytes"] = {
+        "png_text": len(render_png(text)),
+        "svg_text": len(render_svg(text)),
+        "png_url": len(render_png(url)),
+        "svg_url": len(render_svg(url)),
+    }
+    results["password_hash"]["method"] = hasher.current_params
+    results["instrumentation"] = instrumentation_overhead(app_module, args.micro_iterations * 10)
+    return results
+
+
+def instrumentation_overhead(app_module, iterations):
+    # The hooks a typical emergency page request runs: request start/finish, one pool
+    # checkout, two SQL statements and a template render. Compare against the bare
+    # request context to get the added cost per request.
+    import instrumentation
+    from flask import request
+
+    app = app_module.app
+    response = app.response_class("ok")
+
+    def bare():
+        with app.test_request_context("/E/token"):
+            request.endpoint
+
+    def instrumented():
+        with app.test_request_context("/E/token"):
+            instrumentation._start_request()
+            instrumentation.observe_checkout(0.0001)
+            instrumentation.observe_sql("SELECT name FROM emergency_contacts", 0.0002)
+            instrumentation.observe_sql("SELECT 1", 0.0001)
+            instrumentation.record_phase("render", 0.0003)
+            instrumentation.TEMPLATE_SECONDS.labels("emergency_info.html").observe(0.0003)
+            instrumentation._finish_request(response)
+
+    results = {
+        "request_context": micro(bare, iterations),
+        "request_context_instrumented": micro(instrumented, iterations),
+    }
+    results["added_us_p50"] = round((results["request_context_instrumented"]["p50_ms"]
+                                     - results["request_context"]["p50_ms"]) * 1000, 1)
+    results["multiprocess"] = instrumentation.MULTIPROCESS
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    # Prints the change in each latency/throughput figure against an earlier run
+    for section in ("routes", "micro"):
+        for name, figures in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                if before.get(key) and key in figures:
+                    changes.append("%s %+.1f%%" % (key, (figures[key] - before[key]) / before[key] * 100))
+            if changes:
+                print("%-8s %-16s %s" % (section, name, ", ".join(changes)), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every route against a local SQLite stand-in.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--contacts", type=int, default=1000, help="Emergency contacts to seed")
+    parser.add_argument("--users", type=int, default=100, help="Users to seed")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="Comma-separated subset of: " + ", ".join(ROUTES))
+    parser.add_argument("--micro-iterations", type=int, default=200, help="Iterations per QR micro-benchmark")
+    parser.add_argument("--hash-iterations", type=int, default=20, help="Iterations per hashing micro-benchmark")
+    parser.add_argument("--skip-micro", action="store_true", help="Only run the route benchmarks")
+    parser.add_argument("--multiprocess-metrics", action="store_true",
+                        help="Record metrics through prometheus_client's multiprocess files, as under gunicorn")
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error("Unknown routes: " + ", ".join(sorted(unknown)))
+
+    from werkzeug.serving import make_server
+
+    with tempfile.TemporaryDirectory(prefix="quickcare-bench-") as workdir:
+        app_module = setup_app(workdir, args)
+        tokens = seed(app_module, args.contacts, args.users)
+
+        server = make_server("127.0.0.1", 0, app_module.app, threaded=True, request_handler=_quiet_handler())
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            results = {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "config": vars(args),
+                "routes": {},
+            }
+            for route in routes:
+                results["routes"][route] = drive(server.server_port, route, args, tokens)
+                print("%-16s %s" % (route, results["routes"][route]), file=sys.stderr)
+            if not args.skip_micro:
+                results["micro"] = micro_benchmarks(app_module, args)
+            results["pool"] = app_module.db_pool.stats()
+        finally:
+            server.shutdown()
+            app_module.db_pool.closeall()
+
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
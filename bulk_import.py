@@ -0,0 +1,240 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+from contact_rows import iter_rows
+from user_repository import PostgresContactRepository, ensure_sqlite_schema, normalise_vehicle
+
+CONFLICT_FIELDS = ("line", "full_name", "mobile", "vehicle", "reason", "raw")
+
+
+class SQLiteTarget:
+    # The users table created by database.py
+    table = "users"
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        ensure_sqlite_schema(self.conn)
+        self.IntegrityError = sqlite3.IntegrityError
+
+    def existing_keys(self):
+        cur = self.conn.execute("SELECT mobile, vehicle FROM %s" % self.table)
+        return cur.fetchall()
+
+    def insert_batch(self, rows):
+        self.conn.executemany(
+            "INSERT INTO %s (name, mobile, vehicle, vehicle_key) VALUES (?, ?, ?, ?)" % self.table,
+            [(r["full_name"], r["mobile"], r["vehicle"], normalise_vehicle(r["vehicle"])) for r in rows],
+        )
+
+    def insert_row(self, row):
+        # A failed statement does not abort the surrounding SQLite transaction
+        self.conn.execute(
+            "INSERT INTO %s (name, mobile, vehicle, vehicle_key) VALUES (?, ?, ?, ?)" % self.table,
+            (row["full_name"], row["mobile"], row["vehicle"], normalise_vehicle(row["vehicle"])),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresTarget:
+    # The emergency_contacts table created by app.init_db()
+    table = "emergency_contacts"
+    # Only the owner can view or change a contact from the web, so every imported row gets
+    # one. Rows already there without an owner (imported before owners existed) are claimed
+    # for it; a plate another account owns is rejected.
+    insert_sql = """
+        INSERT INTO emergency_contacts (name, mobile, vehicle, owner) VALUES %%s
+        %s DO UPDATE SET name = EXCLUDED.name, mobile = EXCLUDED.mobile,
+                         vehicle = EXCLUDED.vehicle, owner = EXCLUDED.owner
+        WHERE emergency_contacts.owner IS NULL
+        RETURNING id
+    """ % PostgresContactRepository.ON_CONFLICT
+
+    def __init__(self, url, owner):
+        import psycopg2
+        from psycopg2.extras import execute_values
+
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        self.conn = psycopg2.connect(url)
+        self.owner = owner
+        self.IntegrityError = psycopg2.IntegrityError
+        self._execute_values = execute_values
+
+    def existing_keys(self):
+        with self.conn.cursor() as cur:
+            # Owner-less rows are claimed rather than treated as duplicates
+            cur.execute("SELECT mobile, vehicle FROM %s WHERE owner IS NOT NULL" % self.table)
+            rows = cur.fetchall()
+        self.conn.rollback()
+        return rows
+
+    def insert_batch(self, rows):
+        # One multi-row INSERT per batch instead of a round trip per row
+        with self.conn.cursor() as cur:
+            saved = self._execute_values(
+                cur,
+                self.insert_sql,
+                [(r["full_name"], r["mobile"], r["vehicle"], self.owner) for r in rows],
+                page_size=len(rows),
+                fetch=True,
+            )
+        if len(saved) < len(rows):
+            # Another account registered one of these plates since we loaded the keys
+            raise self.IntegrityError("vehicle is registered to another account")
+
+    def insert_row(self, row):
+        # A failed statement aborts a Postgres transaction, so isolate each row
+        with self.conn.cursor() as cur:
+            cur.execute("SAVEPOINT import_row")
+            try:
+                cur.execute(self.insert_sql % "(%s, %s, %s, %s)",
+                            (row["full_name"], row["mobile"], row["vehicle"], self.owner))
+                if cur.fetchone() is None:
+                    raise self.IntegrityError("vehicle is registered to another account")
+            except self.IntegrityError:
+                cur.execute("ROLLBACK TO SAVEPOINT import_row")
+                raise
+            cur.execute("RELEASE SAVEPOINT import_row")
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+class Importer:
+    def __init__(self, target, batch_size=1000, conflicts=None):
+        self.target = target
+        self.batch_size = batch_size
+        self.conflicts = conflicts
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+
+        # Where each key was first seen: a line number, or "database".
+        # Vehicles are compared by their normalised plate.
+        self.mobiles = {}
+        self.vehicles = {}
+        for mobile, vehicle in target.existing_keys():
+            self.mobiles[mobile] = "database"
+            self.vehicles[normalise_vehicle(vehicle)] = "database"
+
+    def _reject(self, line_no, row, reason):
+        self.rejected += 1
+        if self.conflicts is not None:
+            entry = {"line": line_no, "reason": reason}
+            entry.update(row or {})
+            self.conflicts.writerow(entry)
+
+    def _duplicate(self, row):
+        keys = (("mobile", row["mobile"], self.mobiles),
+                ("vehicle", normalise_vehicle(row["vehicle"]), self.vehicles))
+        for field, key, seen in keys:
+            origin = seen.get(key)
+            if origin == "database":
+                return "%s already exists in the database" % field
+            if origin is not None:
+                return "%s duplicates line %s" % (field, origin)
+        return None
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.target.insert_batch([row for _, row in batch])
+            self.target.commit()
+            self.inserted += len(batch)
+            return
+        except self.target.IntegrityError:
+            # Someone else wrote a conflicting row since we loaded the keys
+            self.target.rollback()
+
+        for line_no, row in batch:
+            try:
+                self.target.insert_row(row)
+                self.inserted += 1
+            except self.target.IntegrityError as e:
+                self._reject(line_no, row, "Rejected by database: %s" % str(e).strip())
+        self.target.commit()
+
+    def run(self, rows):
+        batch = []
+        for line_no, row, error in rows:
+            self.read += 1
+            if error:
+                self._reject(line_no, row, error)
+                continue
+            reason = self._duplicate(row)
+            if reason:
+                self._reject(line_no, row, reason)
+                continue
+            self.mobiles[row["mobile"]] = line_no
+            self.vehicles[normalise_vehicle(row["vehicle"])] = line_no
+            batch.append((line_no, row))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import emergency contacts from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV or JSONL file with full_name, mobile and vehicle columns")
+    parser.add_argument("--backend", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--db", default="users.db", help="SQLite database file (sqlite backend)")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Postgres URL (postgres backend, default: $DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT and transaction")
+    parser.add_argument("--conflicts", default="conflicts.csv", help="Where to write rejected rows")
+    parser.add_argument("--owner", help="Username that owns the imported contacts (postgres backend); "
+                                        "existing contacts without an owner are assigned to it")
+    args = parser.parse_args(argv)
+
+    if args.backend == "postgres":
+        if not args.database_url:
+            parser.error("--database-url or DATABASE_URL is required for the postgres backend")
+        if not args.owner:
+            parser.error("--owner is required for the postgres backend")
+        target = PostgresTarget(args.database_url, args.owner)
+    else:
+        if args.owner:
+            parser.error("--owner only applies to the postgres backend")
+        target = SQLiteTarget(args.db)
+
+    started = time.perf_counter()
+    try:
+        with open(args.input, newline="", encoding="utf-8-sig") as src, \
+                open(args.conflicts, "w", newline="", encoding="utf-8") as out:
+            conflicts = csv.DictWriter(out, fieldnames=CONFLICT_FIELDS)
+            conflicts.writeheader()
+            importer = Importer(target, args.batch_size, conflicts)
+            importer.run(iter_rows(src, args.input))
+    finally:
+        target.close()
+    elapsed = time.perf_counter() - started
+
+    rate = importer.read / elapsed if elapsed else 0.0
+    print("Read %d rows in %.2fs (%.0f rows/s): %d inserted, %d rejected -> %s"
+          % (importer.read, elapsed, rate, importer.inserted, importer.rejected, args.conflicts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import csv
+import json
+
+FIELDS = ("full_name", "mobile", "vehicle")
+
+# Column names accepted in uploaded files besides the form field names
+ALIASES = {
+    "name": "full_name",
+    "fullname": "full_name",
+    "phone": "mobile",
+    "vehicle_number": "vehicle",
+}
+
+
+def _normalise(record):
+    row = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        key = key.strip().lower()
+        key = ALIASES.get(key, key)
+        if key in FIELDS:
+            row[key] = "" if value is None else str(value).strip()
+    missing = [field for field in FIELDS if not row.get(field)]
+    if missing:
+        row["raw"] = json.dumps(record, ensure_ascii=False)
+        return row, "Missing " + ", ".join(missing)
+    return row, None
+
+
+def is_jsonl(filename):
+    return filename.lower().endswith((".jsonl", ".ndjson"))
+
+
+def iter_rows(stream, filename):
+    # Yields (line_no, row, error) for every record. When error is set, row holds whatever
+    # fields could be read plus the record as uploaded under "raw", for the report
+    if is_jsonl(filename):
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, {"raw": line.rstrip("\r\n")}, "Invalid JSON: %s" % e
+                continue
+            if not isinstance(record, dict):
+                yield line_no, {"raw": line.rstrip("\r\n")}, "Expected a JSON object"
+                continue
+            row, error = _normalise(record)
+            yield line_no, row, error
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            row, error = _normalise(record)
+            yield reader.line_num, row, error
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0, recycle=1800, health_check_after=30,
+                 on_checkout=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: min=%s max=%s" % (min_size, max_size))
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        # Connections older than `recycle` seconds are closed and replaced
+        self.recycle = recycle
+        # Idle connections are pinged before reuse once they sat this long
+        self.health_check_after = health_check_after
+        # Called with the seconds each successful getconn() took
+        self.on_checkout = on_checkout
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._created = {}  # id(conn) -> created_at, for checked-out connections
+        self._size = 0
+        self._waiting = 0
+        self._refilling = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._refill_errors = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def fill(self):
+        # Open connections up to min_size ahead of the first requests
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, now, now))
+                self._cond.notify()
+
+    def _refill_later(self):
+        # Discards can leave fewer than min_size connections; top up off the request path
+        with self._cond:
+            if self._refilling or self._size >= self.min_size:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, name="db-pool-refill", daemon=True).start()
+
+    def _refill(self):
+        try:
+            self.fill()
+        except Exception:
+            with self._cond:
+                self._refill_errors += 1
+        finally:
+            with self._cond:
+                self._refilling = False
+
+    def _healthy(self, conn):
+        if getattr(conn, "closed", 0):
+            return False
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            finally:
+                cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    conn, created, last_used = None, None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout("No database connection available within %.1fs" % self.timeout)
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            now = time.monotonic()
+            if conn is not None:
+                stale = self.recycle and now - created > self.recycle
+                if stale or (now - last_used > self.health_check_after and not self._healthy(conn)):
+                    self._close(conn)
+                    with self._cond:
+                        self._discarded += 1
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+                created = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            self._refill_later()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._created[id(conn)] = created
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if self.on_checkout is not None:
+            self.on_checkout(waited)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            created = self._created.pop(id(conn), None)
+        if created is None:
+            raise ValueError("Connection does not belong to this pool")
+
+        if not discard and not getattr(conn, "closed", 0):
+            try:
+                # Never hand the next request an open transaction
+                conn.rollback()
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        with self._cond:
+            if discard:
+                self._discarded += 1
+                self._size -= 1
+            else:
+                self._idle.append((conn, created, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close(conn)
+            self._refill_later()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            self.putconn(conn, discard=getattr(conn, "closed", 0))
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "refill_errors": self._refill_errors,
+                "wait_avg_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
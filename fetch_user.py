@@ -1,18 +1,18 @@
-import sqlite3
+from user_repository import get_repository
 
 def get_user_by_vehicle(vehicle):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM users WHERE vehicle = ?", (vehicle,))
-    user = cursor.fetchone()
-    
-    conn.close()
-    
+    # Matches regardless of case, spaces or dashes in the plate
+    user = get_repository("users.db").get_user_by_vehicle(vehicle)
+
     if user:
         return user  # Returns (id, name, mobile, vehicle)
     else:
         return None
 
+def get_users_by_vehicles(vehicles):
+    # One query for the whole list; returns {vehicle: user or None}
+    return get_repository("users.db").get_users_by_vehicles(vehicles)
+
 # Example Usage
-# print(get_user_by_vehicle("KA01AB1234"))
\ No newline at end of file
+# print(get_user_by_vehicle("KA01AB1234"))
+# print(get_users_by_vehicles(["KA01AB1234", "ka 01 ab 5678"]))
\ No newline at end of file
@@ -0,0 +1,33 @@
+import glob
+import os
+import tempfile
+
+# Picked up automatically when gunicorn runs from this directory: gunicorn app:app
+#
+# The app bounds slow work per process with threads (password hashing queue, DB pool,
+# batch render pool) and answers 503 when they are full. Sync workers serve one request
+# at a time, so those limits never engage and a login burst ties up every worker;
+# run threaded workers instead.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Keep PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE (default 10) below this, so some
+# threads are always left for the emergency pages
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+bind = "0.0.0.0:" + os.getenv("PORT", "8000")
+
+# prometheus_client multiprocess mode: workers write metrics to files here and /metrics on any
+# worker merges them. Must be set before the app imports prometheus_client.
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "quickcare-metrics"))
+
+
+def on_starting(server):
+    # Counters restart from zero with the server, as Prometheus expects of a restart
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    # Drops the worker's live gauges; its counters stay in the totals
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,14 +1,9 @@
 import sqlite3
+from user_repository import get_repository
 
 def insert_user(name, mobile, vehicle):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("INSERT INTO users (name, mobile, vehicle) VALUES (?, ?, ?)", (name, mobile, vehicle))
-        conn.commit()
+        get_repository("users.db").insert_user(name, mobile, vehicle)
         print("User added successfully!")
     except sqlite3.IntegrityError:
-        print("Error: Mobile number or vehicle number already exists!")
-    
-    conn.close()
\ No newline at end of file
+        print("Error: Mobile number or vehicle number already exists!")
\ No newline at end of file
@@ -0,0 +1,243 @@
+import functools
+import hmac
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import psycopg2.extensions
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+slow_log = logging.getLogger("quickcare.slow")
+
+# With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does), every worker writes its metrics
+# there and a scrape of any worker returns the totals for all of them
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Seconds; covers a cached page hit up to a slow password hash
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    "quickcare_request_seconds", "Time spent handling a request", ("endpoint", "method"), buckets=BUCKETS)
+REQUESTS = Counter(
+    "quickcare_requests", "Requests handled, by response status", ("endpoint", "method", "status"))
+DB_CHECKOUT_SECONDS = Histogram(
+    "quickcare_db_checkout_seconds", "Time to check a connection out of the pool", buckets=BUCKETS)
+SQL_SECONDS = Histogram(
+    "quickcare_sql_seconds", "Time spent executing SQL statements", ("statement",), buckets=BUCKETS)
+TEMPLATE_SECONDS = Histogram(
+    "quickcare_template_render_seconds", "Time spent rendering Jinja templates", ("template",), buckets=BUCKETS)
+QR_RENDER_SECONDS = Histogram(
+    "quickcare_qr_render_seconds", "Time spent rendering QR images on cache misses", ("format",), buckets=BUCKETS)
+PASSWORD_HASH_SECONDS = Histogram(
+    "quickcare_password_hash_seconds", "Time spent hashing or verifying passwords", ("operation",),
+    buckets=BUCKETS)
+ERRORS = Counter(
+    "quickcare_errors", "Errors logged by the app", ("where",))
+
+# /metrics, /pool-stats and /cache-stats need "Authorization: Bearer <METRICS_TOKEN>";
+# they answer 404 when no token is configured
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Workers copy their stats() figures into metrics at most this often, from their own requests
+STATS_SYNC_SECONDS = float(os.getenv("METRICS_STATS_SYNC_SECONDS", "5"))
+
+# Requests slower than this are logged with a per-phase breakdown
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_MS", "500")) / 1000
+# Per-endpoint overrides, e.g. "emergency_info=100,login=1500"
+SLOW_REQUEST_THRESHOLDS = {
+    endpoint.strip(): float(ms) / 1000
+    for endpoint, _, ms in (item.partition("=") for item in os.getenv("SLOW_REQUEST_MS_BY_ENDPOINT", "").split(","))
+    if endpoint.strip() and ms
+}
+
+
+_STATEMENT_RE = re.compile(r"\s*(\w+)")
+
+_stats_sources = []  # (collect, {key: Gauge}, {key: Counter}, {key: last total})
+_stats_lock = threading.Lock()
+_next_stats_sync = 0.0
+
+
+def export_stats(prefix, help, collect, gauges=(), shared_gauges=(), counters=()):
+    # Publishes figures from a stats() dict. `gauges` are this worker's current levels and are
+    # summed over live workers; `shared_gauges` describe state all workers share (the QR
+    # folder), so the largest is reported; `counters` are running totals.
+    _stats_sources.append((
+        collect,
+        dict([(key, Gauge("%s_%s" % (prefix, key), help, multiprocess_mode="livesum")) for key in gauges] +
+             [(key, Gauge("%s_%s" % (prefix, key), help, multiprocess_mode="livemax")) for key in shared_gauges]),
+        {key: Counter("%s_%s" % (prefix, key), help) for key in counters},
+        {},
+    ))
+
+
+def sync_stats(force=False):
+    global _next_stats_sync
+    now = time.monotonic()
+    if not force and now < _next_stats_sync:
+        return
+    # Another thread is already copying them
+    if not _stats_lock.acquire(blocking=False):
+        return
+    try:
+        _next_stats_sync = now + STATS_SYNC_SECONDS
+        for collect, gauges, counters, last in _stats_sources:
+            values = collect()
+            for key, gauge in gauges.items():
+                gauge.set(values[key])
+            for key, counter in counters.items():
+                delta = values[key] - last.get(key, 0)
+                if delta < 0:
+                    # The source restarted from zero (e.g. its stats were reset) since the last sync
+                    delta = values[key]
+                if delta > 0:
+                    counter.inc(delta)
+                last[key] = values[key]
+    finally:
+        _stats_lock.release()
+
+
+def authorized():
+    supplied = request.headers.get("Authorization", "")
+    return bool(METRICS_TOKEN) and hmac.compare_digest(supplied.encode(), ("Bearer " + METRICS_TOKEN).encode())
+
+
+def _current_phases():
+    # The current request's breakdown, or None outside requests
+    if has_request_context():
+        return g.get("phases")
+    return None
+
+
+def record_phase(phase, seconds):
+    phases = _current_phases()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0) + seconds
+
+
+def observe_checkout(seconds):
+    DB_CHECKOUT_SECONDS.observe(seconds)
+    record_phase("db_checkout", seconds)
+
+
+def observe_sql(sql, seconds):
+    if isinstance(sql, bytes):
+        sql = sql[:32].decode("ascii", "replace")
+    match = _STATEMENT_RE.match(sql)
+    SQL_SECONDS.labels(match.group(1).upper() if match else "").observe(seconds)
+    phases = _current_phases()
+    if phases is not None:
+        phases["sql"] = phases.get("sql", 0) + seconds
+        phases["sql_statements"] = phases.get("sql_statements", 0) + 1
+
+
+def observe_qr_render(fmt, seconds):
+    QR_RENDER_SECONDS.labels(fmt).observe(seconds)
+    record_phase("qr_render", seconds)
+
+
+def observe_password_hash(operation, seconds):
+    PASSWORD_HASH_SECONDS.labels(operation).observe(seconds)
+    record_phase("password_hash", seconds)
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    # psycopg2 cursor_factory that times every statement
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            observe_sql(query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            observe_sql(query, time.perf_counter() - started)
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.phases = {}
+
+
+def _finish_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    phases = g.get("phases")
+    observe = functools.partial(
+        _observe_request, started, request.endpoint or "unmatched", request.method, request.path,
+        response.status_code, phases if phases is not None else {})
+    if response.is_streamed:
+        # after_request runs before a streamed body (e.g. the /batch_qr ZIP) is generated, so
+        # time it when the server closes the response; phases recorded meanwhile still count
+        response.call_on_close(observe)
+    else:
+        observe()
+    return response
+
+
+def _observe_request(started, endpoint, method, path, status, phases):
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.labels(endpoint, method).observe(elapsed)
+    REQUESTS.labels(endpoint, method, status).inc()
+    sync_stats()
+
+    if elapsed >= SLOW_REQUEST_THRESHOLDS.get(endpoint, SLOW_REQUEST_SECONDS):
+        breakdown = {
+            phase + ("" if phase == "sql_statements" else "_ms"):
+                value if phase == "sql_statements" else round(value * 1000, 3)
+            for phase, value in phases.items()
+        }
+        accounted = sum(value for phase, value in phases.items() if phase != "sql_statements")
+        breakdown["other_ms"] = round(max(elapsed - accounted, 0.0) * 1000, 3)
+        slow_log.warning(json.dumps({
+            "event": "slow_request",
+            "method": method,
+            "path": path,
+            "endpoint": endpoint,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "phases": breakdown,
+        }, sort_keys=True))
+
+
+def _template_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+
+def _template_finished(sender, template, context, **extra):
+    started = g.pop("render_started", None)
+    if started is not None:
+        seconds = time.perf_counter() - started
+        TEMPLATE_SECONDS.labels(template.name or "").observe(seconds)
+        record_phase("render", seconds)
+
+
+def metrics_view():
+    if not authorized():
+        return "Not Found", 404
+    sync_stats(force=True)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+
+
+def init_app(app):
+    # Call before other extensions so their before_request hooks are timed too
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,60 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    # hashlib's scrypt/pbkdf2 release the GIL, so a few threads hash in parallel
+    # while request threads keep serving other routes
+    def __init__(self, method="scrypt", workers=2, queue_limit=8, timeout=10.0, on_complete=None):
+        self.method = method
+        self.timeout = timeout
+        # Called with ("hash" or "verify", seconds including queue wait)
+        self.on_complete = on_complete
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        # Running plus queued jobs; anything beyond this is rejected immediately
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.timeouts = 0
+        # Stored hashes start with the method and its parameters, e.g. "scrypt:32768:8:1"
+        self.current_params = generate_password_hash("", method=method).split("$", 1)[0]
+
+    def _run(self, operation, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy("Password hashing queue is full")
+        started = time.perf_counter()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            result = future.result(self.timeout)
+        except TimeoutError:
+            # The job keeps its slot until it finishes, so a stuck queue keeps shedding load
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise HashingBusy("Password hashing took longer than %.1fs" % self.timeout)
+        if self.on_complete is not None:
+            self.on_complete(operation, time.perf_counter() - started)
+        return result
+
+    def hash(self, password):
+        return self._run("hash", generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run("verify", check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split("$", 1)[0] != self.current_params
@@ -0,0 +1,169 @@
+import argparse
+import csv
+import io
+import os
+import multiprocessing
+import re
+import sys
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from contact_rows import iter_rows
+from qr_cache import ERROR_CORRECTION, RENDERERS, contact_text
+
+REPORT_FIELDS = ("line", "full_name", "mobile", "vehicle", "file", "error", "raw")
+
+# Forking a threaded web worker can hand the child locks held by other threads
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+class _ChunkWriter(io.RawIOBase):
+    # Unseekable sink so ZipFile writes data descriptors and we can stream it out
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _file_name(line_no, vehicle, fmt):
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", vehicle).strip("_") or "qr"
+    return "%05d_%s.%s" % (line_no, safe, fmt)
+
+
+def _contact_text(row):
+    return contact_text(row["full_name"], row["mobile"], row["vehicle"])
+
+
+def new_executor(workers=None):
+    workers = workers or os.cpu_count() or 1
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+
+
+def shared_executor(workers=None):
+    # One render pool per web worker, started on the first upload and shared by all of them.
+    # Capped by default: every web worker gets its own pool.
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = new_executor(workers or min(os.cpu_count() or 1, 4))
+        return _shared
+
+
+def _drop_shared(executor):
+    # A render process died; the next upload starts a fresh pool
+    global _shared
+    with _shared_lock:
+        if _shared is executor:
+            _shared = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_rendered(rows, executor, ec="M", fmt="png", payload=_contact_text, window=32):
+    # Renders rows on `executor`, keeping at most `window` images in flight.
+    # `payload` turns a row into the QR data; a ValueError from it fails just that row.
+    pending = deque()
+    try:
+        for line_no, row, error in rows:
+            future = None
+            if not error:
+                try:
+                    future = executor.submit(RENDERERS[fmt], payload(row), ec)
+                except ValueError as e:
+                    error = str(e)
+                except BrokenProcessPool:
+                    _drop_shared(executor)
+                    error = "Render failed: worker pool stopped"
+            pending.append((line_no, row, error, future))
+            while len(pending) > window or (pending and pending[0][3] is None):
+                yield _result(pending.popleft())
+        while pending:
+            yield _result(pending.popleft())
+    finally:
+        # The client may hang up mid-download; don't leave its images queued
+        for _, _, _, future in pending:
+            if future is not None:
+                future.cancel()
+
+
+def _result(item):
+    line_no, row, error, future = item
+    if future is None:
+        return line_no, row, None, error
+    try:
+        return line_no, row, future.result(), None
+    except BrokenProcessPool:
+        return line_no, row, None, "Render failed: worker pool stopped"
+    except Exception as e:
+        return line_no, row, None, "Render failed: %s" % e
+
+
+def stream_zip(rows, executor=None, stats=None, ec="M", fmt="png", payload=None):
+    # Yields the ZIP archive in chunks as each image finishes
+    executor = executor or shared_executor()
+    payload = payload or _contact_text
+    stats = stats if stats is not None else {}
+    stats.setdefault("rendered", 0)
+    stats.setdefault("failed", 0)
+    sink = _ChunkWriter()
+    report = io.StringIO()
+    writer = csv.DictWriter(report, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for line_no, row, image, error in iter_rendered(rows, executor, ec, fmt, payload):
+            entry = {"line": line_no, "error": error or ""}
+            if row:
+                entry.update(row)
+            if image is None:
+                stats["failed"] += 1
+            else:
+                stats["rendered"] += 1
+                entry["file"] = _file_name(line_no, row["vehicle"], fmt)
+                # PNG is already compressed and SVGs are small, so store them as is
+                archive.writestr(entry["file"], image)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+            writer.writerow(entry)
+        archive.writestr("report.csv", report.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate QR codes for a fleet from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV or JSONL file with full_name, mobile and vehicle columns")
+    parser.add_argument("output", help="ZIP file to write")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count)")
+    parser.add_argument("--ec", default="M", choices=sorted(ERROR_CORRECTION), help="Error correction level")
+    parser.add_argument("--format", default="png", choices=sorted(RENDERERS), help="Image format")
+    # Link-mode codes need the database and signing key, so they are only made through /batch_qr
+    args = parser.parse_args(argv)
+
+    stats = {}
+    with new_executor(args.workers) as executor, \
+            open(args.input, newline="", encoding="utf-8-sig") as src, open(args.output, "wb") as out:
+        for chunk in stream_zip(iter_rows(src, args.input), executor, stats, args.ec, args.format):
+            out.write(chunk)
+
+    print("Wrote %s: %d QR codes, %d failed rows (see report.csv)" % (args.output, stats["rendered"], stats["failed"]))
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
+
+NAME_RE = re.compile(r"^[0-9a-f]{64}\.(png|svg)$")
+
+ERROR_CORRECTION = {
+    "L": ERROR_CORRECT_L,
+    "M": ERROR_CORRECT_M,
+    "Q": ERROR_CORRECT_Q,
+    "H": ERROR_CORRECT_H,
+}
+
+MIMETYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def contact_text(full_name, mobile, vehicle):
+    return f"Name: {full_name}\nMobile: {mobile}\nVehicle: {vehicle}"
+
+
+def _encode(data, ec):
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECTION[ec])
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(data, ec="M"):
+    qr = _encode(data, ec).make_image()
+    buffer = io.BytesIO()
+    qr.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_svg(data, ec="M"):
+    # One path of horizontal runs in module units: no PIL, and the printer scales it
+    matrix = _encode(data, ec).get_matrix()
+    size = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                runs.append("M%d %dh%dv1h-%dz" % (start, y, x - start, x - start))
+            else:
+                x += 1
+    svg = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 %d %d" shape-rendering="crispEdges">'
+           '<rect width="100%%" height="100%%" fill="#fff"/><path d="%s"/></svg>' % (size, size, "".join(runs)))
+    return svg.encode("ascii")
+
+
+RENDERERS = {
+    "png": render_png,
+    "svg": render_svg,
+}
+
+
+def content_key(data, ec="M", fmt="png"):
+    return hashlib.sha256(("%s|%s|%s" % (fmt, ec, data)).encode("utf-8")).hexdigest()
+
+
+class QRCache:
+    def __init__(self, folder, max_bytes=16 * 1024 * 1024, max_disk_bytes=256 * 1024 * 1024,
+                 max_age=7 * 24 * 3600, on_render=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        # Images on disk are deleted once they pass either limit, least recently used first.
+        # Each worker only counts the files it has seen, so N workers can briefly hold up to
+        # N times the budget between restarts.
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        # Called with (format, seconds) for every image actually rendered
+        self.on_render = on_render
+        os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # file name -> image bytes, oldest first
+        self._bytes = 0
+        self._disk = OrderedDict()  # file name -> (size, last used), oldest first
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._scan()
+        self._trim()
+
+    def _scan(self):
+        # Pick up images written by earlier runs, oldest first
+        found = []
+        for entry in os.scandir(self.folder):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            if NAME_RE.match(entry.name):
+                found.append((st.st_mtime, entry.name, st.st_size))
+            elif entry.name.endswith(".tmp") and time.time() - st.st_mtime > 3600:
+                # Left behind by a worker that died mid-write
+                self._unlink(entry.name)
+        for mtime, name, size in sorted(found):
+            self._disk[name] = (size, mtime)
+            self._disk_bytes += size
+
+    def _unlink(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def _seen_on_disk(self, name, size):
+        # Caller holds the lock
+        if name in self._disk:
+            self._disk_bytes -= self._disk.pop(name)[0]
+        self._disk[name] = (size, time.time())
+        self._disk_bytes += size
+
+    def _forget_locked(self, name):
+        if name in self._disk:
+            self._disk_bytes -= self._disk.pop(name)[0]
+        image = self._entries.pop(name, None)
+        if image is not None:
+            self._bytes -= len(image)
+
+    def _trim(self):
+        cutoff = time.time() - self.max_age
+        victims = []
+        with self._lock:
+            while self._disk:
+                name, (_, last_used) = next(iter(self._disk.items()))
+                if self._disk_bytes <= self.max_disk_bytes and last_used >= cutoff:
+                    break
+                self._forget_locked(name)
+                victims.append(name)
+            self.disk_evictions += len(victims)
+        for name in victims:
+            self._unlink(name)
+
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _remember(self, name, image):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                return
+            self._entries[name] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def get(self, name):
+        if not NAME_RE.match(name):
+            return None
+        self._trim()
+        with self._lock:
+            image = self._entries.get(name)
+            if image is not None:
+                self._entries.move_to_end(name)
+                if name in self._disk:
+                    self._seen_on_disk(name, len(image))
+                self.hits += 1
+                return image
+        try:
+            with open(self._path(name), "rb") as f:
+                image = f.read()
+        except FileNotFoundError:
+            # Possibly evicted by another worker
+            with self._lock:
+                self._forget_locked(name)
+            return None
+        with self._lock:
+            self._seen_on_disk(name, len(image))
+            self.disk_hits += 1
+        self._remember(name, image)
+        return image
+
+    def get_or_render(self, data, ec="M", fmt="png"):
+        name = "%s.%s" % (content_key(data, ec, fmt), fmt)
+        image = self.get(name)
+        if image is not None:
+            return name, image
+
+        with self._lock:
+            self.misses += 1
+        started = time.perf_counter()
+        image = RENDERERS[fmt](data, ec)
+        if self.on_render is not None:
+            self.on_render(fmt, time.perf_counter() - started)
+        # Write to a temp file first so readers never see a partial image
+        fd, tmp = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(image)
+            os.replace(tmp, self._path(name))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        else:
+            with self._lock:
+                self._seen_on_disk(name, len(image))
+            self._trim()
+        self._remember(name, image)
+        return name, image
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
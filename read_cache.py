@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ReadThroughCache:
+    def __init__(self, ttl=60, max_entries=10000, negative_ttl=5, stale_ttl=0, refresh_workers=2,
+                 max_pending_refreshes=32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Misses (loader returned None) are remembered for a shorter time
+        self.negative_ttl = negative_ttl
+        # Expired entries are served for this long while a background refresh runs
+        self.stale_ttl = stale_ttl
+        # Refreshes run on a small pool; when this many are queued, stale hits skip refreshing
+        self.refresh_workers = refresh_workers
+        self.max_pending_refreshes = max_pending_refreshes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, loaded_at), oldest first
+        self._loading = {}  # key -> lock held by the thread loading it
+        self._refreshing = set()
+        self._refresher = None
+        self._epoch = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.load_errors = 0
+        self.skipped_refreshes = 0
+
+    def _fresh(self, entry, now):
+        value, loaded_at = entry
+        ttl = self.ttl if value is not None else self.negative_ttl
+        return now - loaded_at < ttl
+
+    def get(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if self._fresh(entry, now):
+                    self.hits += 1
+                    return entry[0]
+                value, loaded_at = entry
+                if value is not None and now - loaded_at < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    refresh = key not in self._refreshing
+                    if refresh and len(self._refreshing) >= self.max_pending_refreshes:
+                        # Backend is slow or down; the next stale hit tries again
+                        self.skipped_refreshes += 1
+                        refresh = False
+                    if refresh:
+                        self._refreshing.add(key)
+                        if self._refresher is None:
+                            self._refresher = ThreadPoolExecutor(self.refresh_workers,
+                                                                 thread_name_prefix="cache-refresh")
+                        refresher = self._refresher
+                else:
+                    refresh = None
+        if entry is not None and refresh is not None:
+            if refresh:
+                refresher.submit(self._refresh, key, loader)
+            return entry[0]
+        return self._load(key, loader, entry)
+
+    def _refresh(self, key, loader):
+        try:
+            self._load(key, loader, None)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _load(self, key, loader, previous):
+        started = time.monotonic()
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        # Only one thread per key goes to the backend; the rest wait for its result
+        with key_lock:
+            with self._lock:
+                current = self._entries.get(key)
+                if current is not None and current[1] >= started:
+                    self.hits += 1
+                    return current[0]
+                self.misses += 1
+                epoch = self._epoch
+            try:
+                value = loader()
+            except Exception:
+                with self._lock:
+                    self.load_errors += 1
+                # Serve whatever we last had rather than fail while the backend is down
+                if self.stale_ttl and previous is not None and previous[0] is not None:
+                    return previous[0]
+                raise
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            with self._lock:
+                # Drop results that raced with an invalidation
+                if epoch == self._epoch:
+                    self._entries[key] = (value, time.monotonic())
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "load_errors": self.load_errors,
+                "refreshing": len(self._refreshing),
+                "skipped_refreshes": self.skipped_refreshes,
+            }
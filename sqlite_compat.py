@@ -0,0 +1,141 @@
+import re
+import sqlite3
+import time
+
+# Just enough of psycopg2's connection/cursor API for app.py to run on SQLite,
+# e.g. DATABASE_URL=sqlite:///quick_care_local.db for benchmarks and local work.
+
+_REWRITES = [
+    (re.compile(r"\bSERIAL PRIMARY KEY\b", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"%s"), "?"),
+]
+
+
+# SQLite has no ADD COLUMN IF NOT EXISTS; Cursor.execute checks the table instead
+_ADD_COLUMN_IF_NOT_EXISTS = re.compile(
+    r"^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+IF\s+NOT\s+EXISTS\s+(\w+)\s+(.*)$", re.I | re.S)
+
+
+# psycopg2 adapts a list to an array for "= ANY(%s)"; SQLite needs one placeholder per element
+_ANY_PARAM = re.compile(r"=\s*ANY\s*\(\s*%s\s*\)", re.I)
+_PARAMS = re.compile(r"(=\s*ANY\s*\(\s*%s\s*\)|%s)", re.I)
+
+
+def expand_arrays(sql, params):
+    if not _ANY_PARAM.search(sql):
+        return sql, params
+    parts = _PARAMS.split(sql)
+    values = iter(params)
+    expanded = []
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            continue
+        value = next(values)
+        if part == "%s":
+            expanded.append(value)
+        else:
+            parts[i] = "IN (%s)" % ", ".join(["%s"] * len(value))
+            expanded.extend(value)
+    return "".join(parts), expanded
+
+
+def translate(sql):
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _regexp_replace(value, pattern, replacement, flags):
+    if value is None:
+        return None
+    return re.sub(pattern, replacement, value, count=0 if "g" in flags else 1)
+
+
+class Cursor:
+    def __init__(self, cursor, on_statement=None):
+        self._cursor = cursor
+        self._on_statement = on_statement
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, params=()):
+        match = _ADD_COLUMN_IF_NOT_EXISTS.match(sql)
+        if match:
+            table, column, definition = match.groups()
+            if any(row[1] == column for row in self._cursor.execute("PRAGMA table_info(%s)" % table)):
+                return
+            sql = "ALTER TABLE %s ADD COLUMN %s %s" % (table, column, definition)
+        query, params = expand_arrays(sql, params)
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(translate(query), params)
+        finally:
+            if self._on_statement is not None:
+                self._on_statement(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(translate(sql), seq_of_params)
+        finally:
+            if self._on_statement is not None:
+                self._on_statement(sql, time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    def __init__(self, path, on_statement=None):
+        # Pooled connections move between threads, but only one uses it at a time
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.create_function("regexp_replace", 4, _regexp_replace, deterministic=True)
+        self.closed = 0
+        # Called with (sql, seconds) after every statement
+        self.on_statement = on_statement
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Like psycopg2: commit or roll back, but leave the connection open
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def cursor(self):
+        return Cursor(self._conn.cursor(), self.on_statement)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+        self.closed = 1
+
+
+def connect(path, on_statement=None):
+    return Connection(path, on_statement)
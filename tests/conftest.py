@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    # app.py configures itself from the environment at import time
+    folder = tempfile.mkdtemp()
+    os.environ.update(
+        DATABASE_URL="sqlite:///" + os.path.join(folder, "app.db"),
+        QR_FOLDER=os.path.join(folder, "qr"),
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",
+    )
+    import app
+
+    app.app.config["WTF_CSRF_ENABLED"] = False
+    return app
+
+
+@pytest.fixture
+def login(app_module):
+    def login(username):
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session["username"] = username
+        return client
+    return login
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from attempt_limiter import AttemptLimiter
+
+
+def test_blocks_after_max_attempts():
+    limiter = AttemptLimiter(max_attempts=3, window=60)
+    for _ in range(3):
+        assert not limiter.blocked("alice")
+        limiter.record("alice")
+    assert limiter.blocked("alice")
+    assert not limiter.blocked("bob")
+    assert limiter.blocked_count == 1
+
+
+def test_attempts_expire_after_window():
+    limiter = AttemptLimiter(max_attempts=1, window=0.05)
+    limiter.record("alice")
+    assert limiter.blocked("alice")
+    time.sleep(0.06)
+    assert not limiter.blocked("alice")
+
+
+def test_reset_clears_attempts():
+    limiter = AttemptLimiter(max_attempts=1, window=60)
+    limiter.record("alice")
+    limiter.reset("alice")
+    assert not limiter.blocked("alice")
+
+
+def test_tracked_keys_are_bounded():
+    limiter = AttemptLimiter(max_attempts=1, window=60, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.record(key)
+    assert not limiter.blocked("a")
+    assert limiter.blocked("b") and limiter.blocked("c")
+
+
+def test_concurrent_records_are_all_counted():
+    exact = AttemptLimiter(max_attempts=800, window=60)
+    above = AttemptLimiter(max_attempts=801, window=60)
+
+    def hammer():
+        for _ in range(100):
+            exact.record("alice")
+            above.record("alice")
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert exact.blocked("alice")
+    assert not above.blocked("alice")
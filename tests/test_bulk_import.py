@@ -0,0 +1,150 @@
+import csv
+import io
+import sqlite3
+
+import pytest
+
+import bulk_import
+import sqlite_compat
+from bulk_import import CONFLICT_FIELDS, Importer, PostgresTarget, SQLiteTarget
+from contact_rows import iter_rows
+from db_pool import ConnectionPool
+from user_repository import PostgresContactRepository
+
+
+def rows(text):
+    return iter_rows(io.StringIO("full_name,mobile,vehicle\n" + text), "fleet.csv")
+
+
+def stored(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT name, mobile, vehicle, vehicle_key FROM users ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def run_import(path, text, batch_size=1000):
+    out = io.StringIO()
+    conflicts = csv.DictWriter(out, fieldnames=CONFLICT_FIELDS)
+    conflicts.writeheader()
+    target = SQLiteTarget(path)
+    try:
+        importer = Importer(target, batch_size, conflicts)
+        importer.run(rows(text))
+    finally:
+        target.close()
+    return importer, list(csv.DictReader(io.StringIO(out.getvalue())))
+
+
+def test_duplicates_within_the_file_are_rejected(tmp_path):
+    path = str(tmp_path / "users.db")
+    importer, conflicts = run_import(path, "A,1,KA01AB1234\nB,1,MH12X1\nC,3,ka 01 ab 1234\nD,4,DL1C1\n")
+    assert (importer.read, importer.inserted, importer.rejected) == (4, 2, 2)
+    assert [(c["line"], c["reason"]) for c in conflicts] == [
+        ("3", "mobile duplicates line 2"),
+        ("4", "vehicle duplicates line 2"),
+    ]
+    assert stored(path) == [("A", "1", "KA01AB1234", "KA01AB1234"), ("D", "4", "DL1C1", "DL1C1")]
+
+
+def test_rows_already_in_the_database_are_rejected(tmp_path):
+    path = str(tmp_path / "users.db")
+    run_import(path, "A,1,KA01AB1234\n")
+    importer, conflicts = run_import(path, "B,2,ka-01-ab-1234\nC,1,MH12X1\nD,4,DL1C1\n")
+    assert (importer.inserted, importer.rejected) == (1, 2)
+    assert [c["reason"] for c in conflicts] == [
+        "vehicle already exists in the database",
+        "mobile already exists in the database",
+    ]
+
+
+def test_invalid_rows_are_reported_with_raw_values(tmp_path):
+    importer, conflicts = run_import(str(tmp_path / "users.db"), "A,,KA01AB1234\n")
+    assert importer.rejected == 1
+    assert conflicts[0]["reason"] == "Missing mobile"
+    assert conflicts[0]["vehicle"] == "KA01AB1234" and conflicts[0]["raw"]
+
+
+def test_batch_falls_back_to_row_inserts_after_a_concurrent_write(tmp_path):
+    path = str(tmp_path / "users.db")
+    out = tmp_path / "conflicts.csv"
+    target = SQLiteTarget(path)
+    with open(out, "w", newline="") as f:
+        conflicts = csv.DictWriter(f, fieldnames=CONFLICT_FIELDS)
+        conflicts.writeheader()
+        importer = Importer(target, 1000, conflicts)
+        # Someone else inserts the same plate after the importer loaded the existing keys
+        other = sqlite3.connect(path)
+        other.execute("INSERT INTO users (name, mobile, vehicle, vehicle_key) VALUES ('X', '9', 'KA01AB1234', "
+                      "'KA01AB1234')")
+        other.commit()
+        other.close()
+        batches = []
+        insert_batch = target.insert_batch
+        target.insert_batch = lambda batch: batches.append(len(batch)) or insert_batch(batch)
+        importer.run(rows("A,1,MH12X1\nB,2,ka 01 ab 1234\nC,3,DL1C1\n"))
+    target.close()
+
+    assert batches == [3]
+    assert (importer.inserted, importer.rejected) == (2, 1)
+    assert [name for name, *_ in stored(path)] == ["X", "A", "C"]
+    with open(out, newline="") as f:
+        [conflict] = list(csv.DictReader(f))
+    assert conflict["line"] == "3"
+    assert conflict["reason"].startswith("Rejected by database: UNIQUE constraint failed")
+
+
+def test_main_writes_conflicts_file(tmp_path, capsys):
+    src = tmp_path / "fleet.csv"
+    src.write_text("full_name,mobile,vehicle\nA,1,KA01AB1234\nB,2,KA01AB1234\n")
+    db = tmp_path / "users.db"
+    out = tmp_path / "conflicts.csv"
+    assert bulk_import.main([str(src), "--db", str(db), "--conflicts", str(out)]) == 0
+    assert "1 inserted, 1 rejected" in capsys.readouterr().out
+    with open(out, newline="") as f:
+        assert [row["line"] for row in csv.DictReader(f)] == ["3"]
+
+
+@pytest.mark.parametrize("args, message", [
+    (["--backend", "postgres", "--database-url", "postgresql://db/app"], "--owner is required"),
+    (["--owner", "fleet"], "--owner only applies to the postgres backend"),
+])
+def test_main_checks_owner_option(tmp_path, capsys, args, message):
+    src = tmp_path / "fleet.csv"
+    src.write_text("full_name,mobile,vehicle\nA,1,KA01AB1234\n")
+    with pytest.raises(SystemExit):
+        bulk_import.main([str(src), "--db", str(tmp_path / "users.db")] + args)
+    assert message in capsys.readouterr().err
+
+
+def test_postgres_target_claims_contacts_without_an_owner(tmp_path):
+    # The target's SQL runs on the SQLite stand-in; connecting needs a Postgres server
+    path = str(tmp_path / "contacts.db")
+    pool = ConnectionPool(lambda: sqlite_compat.connect(path), min_size=0, max_size=1)
+    with pool.connection() as conn, conn:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TABLE emergency_contacts (id SERIAL PRIMARY KEY, name TEXT NOT NULL, "
+                        "mobile TEXT NOT NULL UNIQUE, vehicle TEXT NOT NULL UNIQUE, owner TEXT)")
+    repo = PostgresContactRepository(pool)
+    repo.ensure_schema()
+    repo.insert_user("Legacy", "1", "KA01AB1234")
+    repo.insert_user("Bob", "2", "MH12X1", owner="bob")
+
+    target = PostgresTarget.__new__(PostgresTarget)
+    target.conn = sqlite_compat.connect(path)
+    target.owner = "alice"
+    target.IntegrityError = sqlite3.IntegrityError
+    try:
+        assert target.existing_keys() == [("2", "MH12X1")]
+        target.insert_row({"full_name": "A", "mobile": "3", "vehicle": "ka 01 ab 1234"})
+        with pytest.raises(sqlite3.IntegrityError):
+            target.insert_row({"full_name": "A", "mobile": "4", "vehicle": "mh-12-x-1"})
+        target.insert_row({"full_name": "C", "mobile": "5", "vehicle": "DL1C1"})
+        target.commit()
+        with target.conn.cursor() as cur:
+            cur.execute("SELECT name, vehicle, owner FROM emergency_contacts ORDER BY id")
+            assert cur.fetchall() == [("A", "ka 01 ab 1234", "alice"), ("Bob", "MH12X1", "bob"),
+                                      ("C", "DL1C1", "alice")]
+    finally:
+        target.close()
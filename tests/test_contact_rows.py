@@ -0,0 +1,27 @@
+import io
+import json
+
+from contact_rows import iter_rows
+
+
+def test_csv_rows_accept_aliases():
+    stream = io.StringIO("Name,Phone,Vehicle_Number\nA,9000000001, KA01AB1234 \n")
+    assert list(iter_rows(stream, "fleet.csv")) == [
+        (2, {"full_name": "A", "mobile": "9000000001", "vehicle": "KA01AB1234"}, None),
+    ]
+
+
+def test_incomplete_csv_row_keeps_what_was_read():
+    stream = io.StringIO("full_name,mobile,vehicle\nB,,KA01AB0002\n")
+    [(line_no, row, error)] = iter_rows(stream, "fleet.csv")
+    assert (line_no, error) == (2, "Missing mobile")
+    assert row["full_name"] == "B" and row["vehicle"] == "KA01AB0002"
+    assert json.loads(row["raw"]) == {"full_name": "B", "mobile": "", "vehicle": "KA01AB0002"}
+
+
+def test_jsonl_errors_keep_the_raw_line():
+    stream = io.StringIO('{"full_name": "X", "mobile": "1", "vehicle": "V1"}\n\n{bad json\n[1]\n')
+    rows = list(iter_rows(stream, "fleet.jsonl"))
+    assert rows[0] == (1, {"full_name": "X", "mobile": "1", "vehicle": "V1"}, None)
+    assert rows[1][0] == 3 and rows[1][1] == {"raw": "{bad json"} and rows[1][2].startswith("Invalid JSON")
+    assert rows[2] == (4, {"raw": "[1]"}, "Expected a JSON object")
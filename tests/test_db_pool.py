@@ -0,0 +1,211 @@
+import threading
+import time
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise RuntimeError("server closed the connection unexpectedly")
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise RuntimeError("server closed the connection unexpectedly")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class Connector:
+    def __init__(self):
+        self.opened = []
+        self.fail = False
+
+    def __call__(self):
+        if self.fail:
+            raise RuntimeError("could not connect to server")
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met within %.1fs" % timeout)
+        time.sleep(0.005)
+
+
+def test_fill_opens_min_size_connections():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=3, max_size=5)
+    pool.fill()
+    assert len(connect.opened) == 3
+    assert pool.stats()["idle"] == 3
+
+
+def test_connections_are_reused_and_rolled_back():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=0, max_size=2)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert conn.rollbacks == 1
+    assert len(connect.opened) == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=1, timeout=0.05)
+    pool.getconn()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert time.monotonic() - started >= 0.05
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 1
+
+
+def test_waiter_gets_returned_connection():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=1, timeout=2.0)
+    conn = pool.getconn()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    wait_for(lambda: pool.stats()["waiting"] == 1)
+    pool.putconn(conn)
+    waiter.join(2.0)
+    assert got == [conn]
+
+
+def test_stale_connection_is_recycled():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=0, max_size=1, recycle=0.01)
+    old = pool.getconn()
+    pool.putconn(old)
+    time.sleep(0.02)
+    new = pool.getconn()
+    assert new is not old
+    assert old.closed
+    stats = pool.stats()
+    assert stats["discarded"] == 1
+    assert stats["size"] == 1
+
+
+def test_idle_connection_failing_health_check_is_replaced():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=0, max_size=1, health_check_after=0)
+    old = pool.getconn()
+    pool.putconn(old)
+    old.broken = True
+    new = pool.getconn()
+    assert new is not old
+    assert old.closed
+    assert pool.stats()["discarded"] == 1
+
+
+def test_closed_connection_is_discarded_on_return():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=2)
+    conn = pool.getconn()
+    conn.closed = 1
+    pool.putconn(conn)
+    stats = pool.stats()
+    assert stats["size"] == 0
+    assert stats["idle"] == 0
+    assert stats["discarded"] == 1
+
+
+def test_connection_that_fails_rollback_is_discarded():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=2)
+    conn = pool.getconn()
+    conn.broken = True
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_context_manager_discards_connection_closed_by_error():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=2)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.closed = 1
+            raise RuntimeError("boom")
+    assert pool.stats()["size"] == 0
+
+
+def test_foreign_connection_is_rejected():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=1)
+    with pytest.raises(ValueError):
+        pool.putconn(FakeConnection())
+
+
+def test_failed_connect_releases_reserved_slot():
+    connect = Connector()
+    connect.fail = True
+    pool = ConnectionPool(connect, min_size=0, max_size=1, timeout=0.05)
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+    connect.fail = False
+    pool.getconn()
+    assert pool.stats()["size"] == 1
+
+
+def test_pool_is_refilled_to_min_size_after_discards():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=2, max_size=4)
+    pool.fill()
+    conn = pool.getconn()
+    pool.putconn(conn, discard=True)
+    wait_for(lambda: pool.stats()["size"] == 2)
+    assert len(connect.opened) == 3
+    assert pool.stats()["idle"] == 2
+
+
+def test_refill_failure_is_counted():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=1, max_size=2)
+    pool.fill()
+    conn = pool.getconn()
+    connect.fail = True
+    pool.putconn(conn, discard=True)
+    wait_for(lambda: pool.stats()["refill_errors"] == 1)
+    assert pool.stats()["size"] == 0
+
+
+def test_stats_accounting():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=3)
+    a = pool.getconn()
+    b = pool.getconn()
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"], stats["checkouts"]) == (2, 0, 2, 2)
+    pool.putconn(a)
+    pool.putconn(b, discard=True)
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"], stats["discarded"]) == (1, 1, 0, 1)
+    assert stats["wait_max_ms"] >= stats["wait_avg_ms"] >= 0
+    pool.closeall()
+    assert pool.stats()["size"] == 0
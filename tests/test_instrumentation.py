@@ -0,0 +1,158 @@
+import itertools
+import json
+import logging
+import time
+
+import pytest
+from flask import Flask, Response, stream_with_context
+from prometheus_client import REGISTRY
+
+import instrumentation
+
+_prefixes = itertools.count()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def source():
+    # A fresh stats() source with its own metric names
+    prefix = "test_stats_%d" % next(_prefixes)
+    values = {"level": 0, "served": 0}
+    instrumentation.export_stats(prefix, "Test figures", lambda: dict(values), gauges=("level",),
+                                 counters=("served",))
+    yield prefix, values
+    instrumentation._stats_sources.pop()
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+
+    @app.route("/quick")
+    def quick():
+        instrumentation.observe_sql("SELECT 1", 0.004)
+        instrumentation.record_phase("render", 0.002)
+        return "ok"
+
+    @app.route("/stream")
+    def stream():
+        def generate():
+            yield "a"
+            time.sleep(0.05)
+            instrumentation.record_phase("qr_render", 0.04)
+            yield "b"
+        return Response(stream_with_context(generate()))
+
+    return app
+
+
+def slow_requests(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records if record.name == "quickcare.slow"]
+
+
+def test_sync_stats_turns_running_totals_into_counter_increments(source):
+    prefix, values = source
+    values.update(level=3, served=5)
+    instrumentation.sync_stats(force=True)
+    assert sample(prefix + "_level") == 3
+    assert sample(prefix + "_served_total") == 5
+
+    values.update(level=1, served=8)
+    instrumentation.sync_stats(force=True)
+    assert sample(prefix + "_level") == 1
+    assert sample(prefix + "_served_total") == 8
+
+    # Unchanged totals add nothing
+    instrumentation.sync_stats(force=True)
+    assert sample(prefix + "_served_total") == 8
+
+
+def test_sync_stats_counts_from_zero_after_a_reset(source):
+    prefix, values = source
+    values["served"] = 10
+    instrumentation.sync_stats(force=True)
+    values["served"] = 4
+    instrumentation.sync_stats(force=True)
+    assert sample(prefix + "_served_total") == 14
+    values["served"] = 6
+    instrumentation.sync_stats(force=True)
+    assert sample(prefix + "_served_total") == 16
+
+
+def test_sync_stats_waits_for_the_interval_unless_forced(source, monkeypatch):
+    prefix, values = source
+    monkeypatch.setattr(instrumentation, "STATS_SYNC_SECONDS", 60)
+    instrumentation.sync_stats(force=True)
+    values["served"] = 7
+    instrumentation.sync_stats()
+    assert sample(prefix + "_served_total") == 0
+    instrumentation.sync_stats(force=True)
+    assert sample(prefix + "_served_total") == 7
+
+
+@pytest.mark.parametrize("token, header, expected", [
+    (None, None, False),
+    (None, "Bearer ", False),
+    ("s3cret", None, False),
+    ("s3cret", "Bearer wrong", False),
+    ("s3cret", "s3cret", False),
+    ("s3cret", "Bearer s3cret", True),
+])
+def test_authorized_needs_the_configured_token(app, monkeypatch, token, header, expected):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", token)
+    headers = {"Authorization": header} if header is not None else {}
+    with app.test_request_context("/metrics", headers=headers):
+        assert instrumentation.authorized() is expected
+
+
+def test_metrics_endpoint_is_hidden_without_the_token(app, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", "s3cret")
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 404
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert b"quickcare_request_seconds" in response.data
+
+
+def test_slow_requests_are_logged_with_a_phase_breakdown(app, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_REQUEST_SECONDS", 0)
+    with caplog.at_level(logging.WARNING, logger="quickcare.slow"):
+        assert app.test_client().get("/quick?x=1").status_code == 200
+    [entry] = slow_requests(caplog)
+    assert entry["event"] == "slow_request"
+    assert (entry["method"], entry["path"], entry["endpoint"], entry["status"]) == ("GET", "/quick", "quick", 200)
+    phases = entry["phases"]
+    assert (phases["sql_ms"], phases["sql_statements"], phases["render_ms"]) == (4.0, 1, 2.0)
+    assert phases["other_ms"] >= 0
+    assert entry["duration_ms"] >= 0
+
+
+def test_per_endpoint_thresholds_override_the_default(app, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_REQUEST_SECONDS", 0)
+    monkeypatch.setattr(instrumentation, "SLOW_REQUEST_THRESHOLDS", {"quick": 10})
+    with caplog.at_level(logging.WARNING, logger="quickcare.slow"):
+        app.test_client().get("/quick")
+    assert slow_requests(caplog) == []
+
+
+def test_streamed_responses_are_timed_until_the_body_is_sent(app, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_REQUEST_SECONDS", 0.04)
+    count = sample("quickcare_request_seconds_count", endpoint="stream", method="GET")
+    slow = sample("quickcare_request_seconds_bucket", endpoint="stream", method="GET", le="0.025")
+    with caplog.at_level(logging.WARNING, logger="quickcare.slow"):
+        response = app.test_client().get("/stream")
+        assert response.data == b"ab"
+        # Nothing is recorded until the server closes the response
+        assert sample("quickcare_request_seconds_count", endpoint="stream", method="GET") == count
+        response.close()
+    assert sample("quickcare_request_seconds_count", endpoint="stream", method="GET") == count + 1
+    # Observed after the 50ms body, not when the view returned
+    assert sample("quickcare_request_seconds_bucket", endpoint="stream", method="GET", le="0.025") == slow
+    [entry] = slow_requests(caplog)
+    assert entry["endpoint"] == "stream"
+    assert entry["duration_ms"] >= 50
+    assert entry["phases"]["qr_render_ms"] == 40.0
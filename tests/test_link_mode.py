@@ -0,0 +1,48 @@
+import csv
+import io
+import zipfile
+
+
+def upload(client, text):
+    data = {"contacts": (io.BytesIO(text.encode("utf-8")), "contacts.csv"), "mode": "url", "format": "svg"}
+    response = client.post("/batch_qr", data=data, content_type="multipart/form-data")
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    return list(csv.DictReader(io.StringIO(archive.read("report.csv").decode("utf-8"))))
+
+
+def contacts(app_module, plate_key):
+    with app_module.db_pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT name, owner FROM emergency_contacts WHERE vehicle LIKE %s", (plate_key + "%",))
+        return cur.fetchall()
+
+
+def test_repeated_plates_in_one_upload_keep_the_first_row(app_module, login):
+    report = upload(login("dup-owner"), "full_name,mobile,vehicle\n"
+                                        "First,9100000001,KA01DP0001\n"
+                                        "Second,9100000002,ka 01 dp 0001\n"
+                                        "Other,9100000003,KA01DP0002\n")
+    assert [row["error"] for row in report] == ["", "Vehicle duplicates line 2", ""]
+    assert report[1]["file"] == ""
+    assert contacts(app_module, "KA01DP0001") == [("First", "dup-owner")]
+
+
+def test_link_mode_is_unavailable_without_the_unique_index(app_module, login, monkeypatch):
+    def refuse():
+        raise RuntimeError("duplicate plates")
+
+    monkeypatch.setattr(app_module, "contact_index_ready", False)
+    monkeypatch.setattr(app_module, "contact_index_checked", None)
+    monkeypatch.setattr(app_module.contact_repository, "ensure_schema", refuse)
+    client = login("index-owner")
+    data = {"full_name": "A", "mobile": "9100000010", "vehicle": "KA01IX0001", "mode": "url"}
+    assert client.post("/generate_qr", data=data).status_code == 503
+
+    # Not retried within the minute, then recovers once the index can be built
+    monkeypatch.undo()
+    monkeypatch.setattr(app_module, "contact_index_ready", False)
+    monkeypatch.setattr(app_module, "contact_index_checked", app_module.time.monotonic())
+    assert client.post("/generate_qr", data=data).status_code == 503
+    monkeypatch.setattr(app_module, "contact_index_checked", app_module.time.monotonic() - 61)
+    assert client.post("/generate_qr", data=data).status_code == 200
+    assert app_module.contact_index_ready
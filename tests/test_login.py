@@ -0,0 +1,47 @@
+import threading
+
+
+def test_login_waiting_for_a_hash_slot_holds_no_connection(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    credentials = {"username": "waiter", "password": "secret"}
+    assert client.post("/register", data=credentials).status_code == 302
+
+    waiting = threading.Event()
+    release = threading.Event()
+    verify = app_module.password_hasher.verify
+
+    def slow_verify(stored, password):
+        waiting.set()
+        release.wait(5)
+        return verify(stored, password)
+
+    monkeypatch.setattr(app_module.password_hasher, "verify", slow_verify)
+    results = []
+    thread = threading.Thread(target=lambda: results.append(client.post("/login", data=credentials)))
+    thread.start()
+    try:
+        assert waiting.wait(5)
+        assert app_module.db_pool.stats()["in_use"] == 0
+    finally:
+        release.set()
+        thread.join(5)
+
+    assert results[0].status_code == 302
+    assert results[0].headers["Location"].endswith("/")
+    assert app_module.db_pool.stats()["in_use"] == 0
+
+
+def test_rehash_on_login_updates_the_stored_hash(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    credentials = {"username": "upgrader", "password": "secret"}
+    assert client.post("/register", data=credentials).status_code == 302
+
+    monkeypatch.setattr(app_module.password_hasher, "method", "pbkdf2:sha256:2000")
+    monkeypatch.setattr(app_module.password_hasher, "current_params", "pbkdf2:sha256:2000")
+    assert client.post("/login", data=credentials).status_code == 302
+
+    with app_module.db_pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT password FROM users WHERE username = %s", ("upgrader",))
+        assert cur.fetchone()[0].startswith("pbkdf2:sha256:2000$")
+    assert app_module.db_pool.stats()["in_use"] == 0
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from password_hashing import HashingBusy, PasswordHasher
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000")
+    stored = hasher.hash("secret")
+    assert hasher.verify(stored, "secret")
+    assert not hasher.verify(stored, "wrong")
+    assert not hasher.needs_rehash(stored)
+
+
+def test_hashes_with_old_parameters_need_rehash():
+    old = PasswordHasher(method="pbkdf2:sha256:1000").hash("secret")
+    assert PasswordHasher(method="pbkdf2:sha256:2000").needs_rehash(old)
+
+
+def test_full_queue_is_rejected_immediately():
+    hasher = PasswordHasher(workers=1, queue_limit=1)
+    release = threading.Event()
+    threads = [threading.Thread(target=hasher._run, args=("hash", release.wait, 2)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    with pytest.raises(HashingBusy):
+        hasher.hash("secret")
+    assert time.monotonic() - started < 0.5
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert hasher.rejected == 1
+    hasher.hash("secret")
+
+
+def test_rejections_are_counted_under_contention():
+    hasher = PasswordHasher(workers=1, queue_limit=0)
+    release = threading.Event()
+    blocker = threading.Thread(target=hasher._run, args=("hash", release.wait, 2))
+    blocker.start()
+    time.sleep(0.05)
+
+    def hammer():
+        for _ in range(200):
+            try:
+                hasher.hash("secret")
+            except HashingBusy:
+                pass
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+    blocker.join(2)
+    assert hasher.rejected == 1600
+
+
+def test_timeout_becomes_hashing_busy():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1, queue_limit=0, timeout=0.05)
+    release = threading.Event()
+    with pytest.raises(HashingBusy):
+        hasher._run("hash", release.wait, 2)
+    assert hasher.timeouts == 1
+    # The slot stays taken until the stuck job finishes
+    with pytest.raises(HashingBusy):
+        hasher.hash("secret")
+    release.set()
+    time.sleep(0.05)
+    hasher.hash("secret")
+
+
+def test_on_complete_reports_operation():
+    seen = []
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", on_complete=lambda op, seconds: seen.append(op))
+    hasher.verify(hasher.hash("secret"), "secret")
+    assert seen == ["hash", "verify"]
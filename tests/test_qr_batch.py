@@ -0,0 +1,92 @@
+import csv
+import io
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+import qr_batch
+from qr_batch import iter_rendered, stream_zip
+
+ROWS = [
+    (2, {"full_name": "A", "mobile": "1", "vehicle": "KA01AB0001"}, None),
+    (3, {"full_name": "B", "mobile": "", "vehicle": "KA01AB0002", "raw": '{"full_name": "B"}'}, "Missing mobile"),
+    (4, {"full_name": "C", "mobile": "3", "vehicle": "KA 01 AB 0003"}, None),
+]
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(2) as executor:
+        yield executor
+
+
+def read_zip(chunks):
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    report = list(csv.DictReader(io.StringIO(archive.read("report.csv").decode())))
+    return archive, report
+
+
+def test_zip_is_streamed_and_valid(executor):
+    stats = {}
+    chunks = list(stream_zip(ROWS, executor, stats))
+    assert len(chunks) > 1
+    archive, report = read_zip(chunks)
+    assert sorted(archive.namelist()) == ["00002_KA01AB0001.png", "00004_KA_01_AB_0003.png", "report.csv"]
+    assert archive.read("00002_KA01AB0001.png").startswith(b"\x89PNG")
+    assert stats == {"rendered": 2, "failed": 1}
+
+
+def test_report_lists_errors_with_raw_values(executor):
+    _, report = read_zip(stream_zip(ROWS, executor))
+    failed = [entry for entry in report if entry["error"]]
+    assert failed == [{"line": "3", "full_name": "B", "mobile": "", "vehicle": "KA01AB0002", "file": "",
+                       "error": "Missing mobile", "raw": '{"full_name": "B"}'}]
+
+
+def test_format_is_threaded_through(executor):
+    archive, _ = read_zip(stream_zip(ROWS[:1], executor, fmt="svg", ec="H"))
+    assert archive.read("00002_KA01AB0001.svg").startswith(b"<svg")
+
+
+def test_payload_value_error_fails_only_its_row(executor):
+    def payload(row):
+        if row["full_name"] == "A":
+            raise ValueError("Vehicle is already registered to another account")
+        return "https://example.com/E/" + row["mobile"]
+
+    stats = {}
+    archive, report = read_zip(stream_zip(ROWS, executor, stats, payload=payload))
+    assert [entry["error"] for entry in report] == [
+        "Vehicle is already registered to another account", "Missing mobile", ""]
+    assert "00004_KA_01_AB_0003.png" in archive.namelist()
+    assert stats == {"rendered": 1, "failed": 2}
+
+
+class HeldExecutor:
+    # The first job completes at once, later ones stay queued
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        if not self.futures:
+            future.set_result(fn(*args))
+        self.futures.append(future)
+        return future
+
+
+def test_closing_the_stream_cancels_pending_renders():
+    executor = HeldExecutor()
+    rendered = iter_rendered([ROWS[0], ROWS[2], ROWS[0]], executor, window=1)
+    line_no, _, image, error = next(rendered)
+    assert (line_no, error) == (2, None) and image.startswith(b"\x89PNG")
+    rendered.close()
+    assert [future.cancelled() for future in executor.futures] == [False, True]
+
+
+def test_shared_executor_is_created_once(monkeypatch):
+    monkeypatch.setattr(qr_batch, "_shared", None)
+    monkeypatch.setattr(qr_batch, "new_executor", lambda workers: object())
+    assert qr_batch.shared_executor(2) is qr_batch.shared_executor(4)
@@ -0,0 +1,45 @@
+import os
+import time
+
+from qr_cache import QRCache
+
+
+def test_images_are_written_once_and_served_from_memory(tmp_path):
+    cache = QRCache(str(tmp_path))
+    name, image = cache.get_or_render("hello")
+    assert os.path.exists(tmp_path / name)
+    assert cache.get_or_render("hello") == (name, image)
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["disk_entries"]) == (1, 1, 1)
+
+
+def test_disk_budget_evicts_least_recently_used(tmp_path):
+    probe = QRCache(str(tmp_path / "probe"))
+    size = len(probe.get_or_render("payload 0")[1])
+    cache = QRCache(str(tmp_path / "qr"), max_disk_bytes=size * 2 + size // 2)
+    first, _ = cache.get_or_render("payload 0")
+    second, _ = cache.get_or_render("payload 1")
+    cache.get(first)
+    third, _ = cache.get_or_render("payload 2")
+    files = set(os.listdir(tmp_path / "qr"))
+    assert files == {first, third}
+    assert cache.get(second) is None
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def test_unused_images_expire(tmp_path):
+    cache = QRCache(str(tmp_path), max_age=0.05)
+    name, _ = cache.get_or_render("contact details")
+    time.sleep(0.1)
+    assert cache.get(name) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_existing_files_are_counted_against_the_budget(tmp_path):
+    first = QRCache(str(tmp_path))
+    name, image = first.get_or_render("left over")
+    old = time.time() - 3600
+    os.utime(tmp_path / name, (old, old))
+    second = QRCache(str(tmp_path), max_age=60)
+    assert second.stats()["disk_entries"] == 0
+    assert not os.path.exists(tmp_path / name)
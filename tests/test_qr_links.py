@@ -0,0 +1,59 @@
+import pytest
+
+from qr_links import MAX_CONTACT_ID, contact_url, sign_contact_id, verify_token
+
+SECRET = "secret"
+
+
+@pytest.mark.parametrize("contact_id", [0, 1, 35, 36, 123456, MAX_CONTACT_ID])
+def test_round_trip(contact_id):
+    token = sign_contact_id(contact_id, SECRET)
+    assert verify_token(token, SECRET) == contact_id
+
+
+def test_token_is_alphanumeric_upper_case():
+    ident, signature = sign_contact_id(123456, SECRET).split("-")
+    assert ident == "2N9C"
+    assert len(signature) == 8
+    assert (ident + signature).isupper()
+
+
+def test_lower_case_token_is_accepted():
+    token = sign_contact_id(123456, SECRET)
+    assert verify_token(token.lower(), SECRET) == 123456
+
+
+def test_tampered_signature_is_rejected():
+    ident, signature = sign_contact_id(42, SECRET).split("-")
+    flipped = ("B" if signature[0] == "A" else "A") + signature[1:]
+    assert verify_token("%s-%s" % (ident, flipped), SECRET) is None
+
+
+def test_signature_does_not_carry_over_to_another_id():
+    _, signature = sign_contact_id(42, SECRET).split("-")
+    assert verify_token("17-%s" % signature, SECRET) is None
+
+
+def test_wrong_secret_is_rejected():
+    assert verify_token(sign_contact_id(42, SECRET), "other") is None
+
+
+@pytest.mark.parametrize("token", [
+    "", "-", "16", "16-", "-AAAAAAAA", "1 6-AAAAAAAA", "1_6-AAAAAAAA", "+16-AAAAAAAA", "1.6-AAAAAAAA",
+])
+def test_malformed_tokens_are_rejected(token):
+    assert verify_token(token, SECRET) is None
+
+
+def test_oversize_ids_are_rejected():
+    assert verify_token("Z" * 3000 + "-AAAAAAAA", SECRET) is None
+    too_big = MAX_CONTACT_ID + 1
+    forged = "%s-%s" % (sign_contact_id(too_big, SECRET).split("-")[0], "A" * 8)
+    assert verify_token(forged, SECRET) is None
+    # Even correctly signed, an id past the column range is not looked up
+    assert verify_token(sign_contact_id(too_big, SECRET), SECRET) is None
+
+
+def test_contact_url_upper_cases_scheme_and_host():
+    url = contact_url("https://example.org/app/", "2N9C-ABCDEFGH")
+    assert url == "HTTPS://EXAMPLE.ORG/app/E/2N9C-ABCDEFGH"
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from read_cache import ReadThroughCache
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met within %.1fs" % timeout)
+        time.sleep(0.005)
+
+
+def test_fresh_entries_are_served_without_loading():
+    cache = ReadThroughCache(ttl=60)
+    calls = []
+    loader = lambda: calls.append(1) or "value"
+    assert cache.get("k", loader) == "value"
+    assert cache.get("k", loader) == "value"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_misses_use_negative_ttl():
+    cache = ReadThroughCache(ttl=60, negative_ttl=0.02)
+    calls = []
+    loader = lambda: calls.append(1)
+    assert cache.get("k", loader) is None
+    assert cache.get("k", loader) is None
+    assert len(calls) == 1
+    time.sleep(0.03)
+    cache.get("k", loader)
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_load_once():
+    cache = ReadThroughCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: calls)
+    time.sleep(0.02)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_refreshing():
+    cache = ReadThroughCache(ttl=0.01, stale_ttl=60)
+    cache.get("k", lambda: "old")
+    time.sleep(0.02)
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(2)
+        return "new"
+
+    assert cache.get("k", slow_loader) == "old"
+    assert cache.stats()["refreshing"] == 1
+    release.set()
+    wait_for(lambda: cache.stats()["refreshing"] == 0)
+    assert cache.get("k", slow_loader) == "new"
+
+
+def test_refreshes_are_bounded():
+    cache = ReadThroughCache(ttl=0.01, stale_ttl=60, refresh_workers=1, max_pending_refreshes=2)
+    for key in range(5):
+        cache.get(key, lambda: "old")
+    time.sleep(0.02)
+    release = threading.Event()
+    loader = lambda: release.wait(2) and "new"
+    for key in range(5):
+        assert cache.get(key, loader) == "old"
+    stats = cache.stats()
+    assert stats["refreshing"] == 2
+    assert stats["skipped_refreshes"] == 3
+    release.set()
+    wait_for(lambda: cache.stats()["refreshing"] == 0)
+    assert threading.active_count() < 10
+
+
+def test_stale_value_is_served_when_backend_fails():
+    cache = ReadThroughCache(ttl=0.01, stale_ttl=60)
+    cache.get("k", lambda: "old")
+    time.sleep(0.02)
+
+    def failing():
+        raise RuntimeError("database down")
+
+    assert cache.get("k", failing) == "old"
+    wait_for(lambda: cache.stats()["load_errors"] == 1)
+
+
+def test_errors_propagate_without_stale_value():
+    cache = ReadThroughCache(ttl=60)
+
+    def failing():
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        cache.get("k", failing)
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_discards_load_in_flight():
+    cache = ReadThroughCache(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+
+    def loader():
+        started.set()
+        release.wait(2)
+        return "old"
+
+    thread = threading.Thread(target=cache.get, args=("k", loader))
+    thread.start()
+    started.wait(2)
+    cache.invalidate("k")
+    release.set()
+    thread.join(2)
+    assert cache.get("k", lambda: "new") == "new"
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ReadThroughCache(ttl=60, max_entries=2)
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: 1)
+    cache.get("c", lambda: 3)
+    assert cache.get("a", lambda: "reloaded") == 1
+    assert cache.get("b", lambda: "reloaded") == "reloaded"
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+import sqlite_compat
+from db_pool import ConnectionPool
+from user_repository import PostgresContactRepository
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite_compat.connect(str(tmp_path / "compat.db"))
+    yield conn
+    conn.close()
+
+
+def test_any_expands_list_parameter(conn):
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE t (id SERIAL PRIMARY KEY, name TEXT)")
+        cur.executemany("INSERT INTO t (name) VALUES (%s)", [("a",), ("b",), ("c",)])
+        cur.execute("SELECT name FROM t WHERE name = ANY(%s) AND id > %s ORDER BY name", (["a", "c", "x"], 0))
+        assert cur.fetchall() == [("a",), ("c",)]
+        cur.execute("SELECT name FROM t WHERE name = ANY(%s)", ([],))
+        assert cur.fetchall() == []
+
+
+def test_expand_arrays_leaves_other_statements_alone():
+    assert sqlite_compat.expand_arrays("SELECT %s", (1,)) == ("SELECT %s", (1,))
+
+
+def test_add_column_if_not_exists_is_idempotent(conn):
+    with conn.cursor() as cur:
+        cur.execute("CREATE TABLE t (id INTEGER)")
+        cur.execute("ALTER TABLE t ADD COLUMN IF NOT EXISTS owner TEXT")
+        cur.execute("ALTER TABLE t ADD COLUMN IF NOT EXISTS owner TEXT")
+        cur.execute("PRAGMA table_info(t)")
+        assert [row[1] for row in cur.fetchall()] == ["id", "owner"]
+
+
+def test_contact_repository_runs_on_the_stand_in(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    pool = ConnectionPool(lambda: sqlite_compat.connect(path), min_size=0, max_size=2)
+    with pool.connection() as conn, conn:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TABLE emergency_contacts (id SERIAL PRIMARY KEY, name TEXT NOT NULL, "
+                        "mobile TEXT NOT NULL UNIQUE, vehicle TEXT NOT NULL UNIQUE, owner TEXT)")
+    repo = PostgresContactRepository(pool)
+    repo.ensure_schema()
+    repo.insert_user("A", "9000000001", "KA01AB1234", owner="alice")
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.insert_user("B", "9000000002", "ka 01 ab 1234")
+    assert repo.get_user_by_vehicle("ka-01-ab-1234") == (1, "A", "9000000001", "KA01AB1234")
+    assert repo.get_users_by_vehicles(["ka01ab1234", "MH12X1"]) == {
+        "ka01ab1234": (1, "A", "9000000001", "KA01AB1234"),
+        "MH12X1": None,
+    }
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT owner FROM emergency_contacts")
+            assert cur.fetchall() == [("alice",)]
+
+
+def test_contact_repository_refuses_to_index_duplicate_plates(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    pool = ConnectionPool(lambda: sqlite_compat.connect(path), min_size=0, max_size=2)
+    with pool.connection() as conn, conn:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TABLE emergency_contacts (id SERIAL PRIMARY KEY, name TEXT NOT NULL, "
+                        "mobile TEXT NOT NULL UNIQUE, vehicle TEXT NOT NULL UNIQUE)")
+            cur.executemany("INSERT INTO emergency_contacts (name, mobile, vehicle) VALUES (%s, %s, %s)",
+                            [("A", "1", "KA01AB1234"), ("B", "2", "ka 01 ab 1234")])
+    with pytest.raises(RuntimeError, match="KA01AB1234"):
+        PostgresContactRepository(pool).ensure_schema()
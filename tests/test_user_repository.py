@@ -0,0 +1,37 @@
+import sqlite3
+
+import pytest
+
+from user_repository import SQLiteUserRepository, ensure_sqlite_schema
+
+
+def test_plates_differing_in_spacing_or_case_are_rejected(tmp_path):
+    repo = SQLiteUserRepository(str(tmp_path / "users.db"))
+    repo.insert_user("A", "9000000001", "KA01AB1234")
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.insert_user("B", "9000000002", "ka 01 ab 1234")
+    assert repo.get_user_by_vehicle("ka-01-ab-1234")[1] == "A"
+
+
+def test_backfill_keeps_oldest_duplicate_and_builds_unique_index(tmp_path):
+    path = str(tmp_path / "users.db")
+    conn = sqlite3.connect(path)
+    # Table as created by database.py, before the normalised key existed
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                 "mobile TEXT UNIQUE NOT NULL, vehicle TEXT UNIQUE NOT NULL)")
+    conn.executemany("INSERT INTO users (name, mobile, vehicle) VALUES (?, ?, ?)",
+                     [("A", "1", "KA01AB1234"), ("B", "2", "ka 01 ab 1234"), ("C", "3", "MH12X1")])
+    conn.commit()
+    ensure_sqlite_schema(conn)
+    keys = dict(conn.execute("SELECT name, vehicle_key FROM users"))
+    assert keys == {"A": "KA01AB1234", "B": None, "C": "MH12X1"}
+    index = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'users_vehicle_key_unique'").fetchone()
+    assert "UNIQUE" in index[0]
+    conn.close()
+
+    repo = SQLiteUserRepository(path)
+    assert repo.get_users_by_vehicles(["ka01ab1234", "mh 12 x 1", "none"]) == {
+        "ka01ab1234": (1, "A", "1", "KA01AB1234"),
+        "mh 12 x 1": (3, "C", "3", "MH12X1"),
+        "none": None,
+    }
@@ -0,0 +1,176 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+# SQLite's default limit on bound parameters is 999 on older builds
+MAX_SQLITE_PARAMS = 900
+
+_NON_ALNUM = re.compile(r"[^A-Za-z0-9]")
+
+logger = logging.getLogger("quickcare")
+
+
+def normalise_vehicle(vehicle):
+    # "ka 01-ab 1234" and "KA01AB1234" are the same plate
+    return _NON_ALNUM.sub("", vehicle or "").upper()
+
+
+def ensure_sqlite_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            mobile TEXT UNIQUE NOT NULL,
+            vehicle TEXT UNIQUE NOT NULL,
+            vehicle_key TEXT
+        )
+    ''')
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+    if "vehicle_key" not in columns:
+        # Tables created by database.py predate the normalised key
+        conn.execute("ALTER TABLE users ADD COLUMN vehicle_key TEXT")
+    # Backfill oldest first; a later row whose plate only differs in spacing or case keeps a NULL
+    # key so the unique index can be built, and is reported for someone to merge by hand
+    taken = {key for key, in conn.execute("SELECT vehicle_key FROM users WHERE vehicle_key IS NOT NULL")}
+    updates, duplicates = [], []
+    for user_id, vehicle in conn.execute("SELECT id, vehicle FROM users WHERE vehicle_key IS NULL ORDER BY id"):
+        key = normalise_vehicle(vehicle)
+        if key in taken:
+            duplicates.append(user_id)
+            continue
+        taken.add(key)
+        updates.append((key, user_id))
+    if updates:
+        conn.executemany("UPDATE users SET vehicle_key = ? WHERE id = ?", updates)
+    if duplicates:
+        logger.warning("users rows %s duplicate another plate after normalisation and are hidden from "
+                       "vehicle lookups until merged", ", ".join(map(str, duplicates)))
+    conn.execute("DROP INDEX IF EXISTS users_vehicle_key")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS users_vehicle_key_unique ON users (vehicle_key)")
+    conn.commit()
+
+
+class SQLiteUserRepository:
+    def __init__(self, path="users.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-16000")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        ensure_sqlite_schema(self.conn)
+
+    def get_user_by_vehicle(self, vehicle):
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT id, name, mobile, vehicle FROM users WHERE vehicle_key = ?",
+                (normalise_vehicle(vehicle),),
+            )
+            return cur.fetchone()
+
+    def get_users_by_vehicles(self, vehicles):
+        # Returns {vehicle: row or None} for each requested vehicle
+        keys = {vehicle: normalise_vehicle(vehicle) for vehicle in vehicles}
+        unique_keys = list(set(keys.values()))
+        found = {}
+        with self._lock:
+            for start in range(0, len(unique_keys), MAX_SQLITE_PARAMS):
+                chunk = unique_keys[start:start + MAX_SQLITE_PARAMS]
+                cur = self.conn.execute(
+                    "SELECT id, name, mobile, vehicle, vehicle_key FROM users WHERE vehicle_key IN (%s)"
+                    % ",".join("?" * len(chunk)),
+                    chunk,
+                )
+                for row in cur:
+                    found.setdefault(row[4], row[:4])
+        return {vehicle: found.get(key) for vehicle, key in keys.items()}
+
+    def insert_user(self, name, mobile, vehicle):
+        key = normalise_vehicle(vehicle)
+        with self._lock:
+            try:
+                # The unique index rejects a plate that only differs in spacing or case
+                cur = self.conn.execute(
+                    "INSERT INTO users (name, mobile, vehicle, vehicle_key) VALUES (?, ?, ?, ?)",
+                    (name, mobile, vehicle, key),
+                )
+                self.conn.commit()
+                return cur.lastrowid
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class PostgresContactRepository:
+    # Same lookups over emergency_contacts, keyed by an expression index
+    KEY_EXPR = "upper(regexp_replace(vehicle, '[^A-Za-z0-9]', '', 'g'))"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    # Conflict target for upserts, matching the unique index below
+    ON_CONFLICT = "ON CONFLICT ((%s))" % KEY_EXPR
+
+    def ensure_schema(self):
+        with self.pool.connection() as conn, conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT %s, count(*) FROM emergency_contacts GROUP BY 1 HAVING count(*) > 1 LIMIT 10"
+                            % self.KEY_EXPR)
+                duplicates = cur.fetchall()
+                if duplicates:
+                    # Deleting someone's contact automatically is not an option; make it loud instead
+                    raise RuntimeError("emergency_contacts has plates that only differ in spacing or case "
+                                       "(%s); merge them so the unique vehicle index can be built"
+                                       % ", ".join(key for key, _ in duplicates))
+                cur.execute("DROP INDEX IF EXISTS emergency_contacts_vehicle_key")
+                cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS emergency_contacts_vehicle_key_unique "
+                            "ON emergency_contacts ((%s))" % self.KEY_EXPR)
+
+    def get_user_by_vehicle(self, vehicle):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, name, mobile, vehicle FROM emergency_contacts WHERE %s = %%s" % self.KEY_EXPR,
+                            (normalise_vehicle(vehicle),))
+                return cur.fetchone()
+
+    def get_users_by_vehicles(self, vehicles):
+        keys = {vehicle: normalise_vehicle(vehicle) for vehicle in vehicles}
+        found = {}
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, name, mobile, vehicle, %s FROM emergency_contacts WHERE %s = ANY(%%s)"
+                            % (self.KEY_EXPR, self.KEY_EXPR),
+                            (list(set(keys.values())),))
+                for row in cur:
+                    found.setdefault(row[4], tuple(row[:4]))
+        return {vehicle: found.get(key) for vehicle, key in keys.items()}
+
+    def insert_user(self, name, mobile, vehicle, owner=None):
+        # Contacts without an owner can't be viewed or changed from the web
+        with self.pool.connection() as conn, conn:
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO emergency_contacts (name, mobile, vehicle, owner) VALUES (%s, %s, %s, %s) "
+                            "RETURNING id", (name, mobile, vehicle, owner))
+                return cur.fetchone()[0]
+
+
+_repository = None
+_repository_pid = None
+_repository_lock = threading.Lock()
+
+
+def get_repository(path="users.db"):
+    # One long-lived connection per process; a forked child opens its own
+    global _repository, _repository_pid
+    with _repository_lock:
+        if _repository is None or _repository_pid != os.getpid() or _repository.path != path:
+            _repository = SQLiteUserRepository(path)
+            _repository_pid = os.getpid()
+        return _repository